@@ -1,29 +1,46 @@
+import sys
+
+if __name__ == "__main__" and "--profile-startup" in sys.argv:
+    # installed before any other import, so the profile includes importing streamlit and the modules of the app
+    from src.profiling import StartupProfiler
+    _startup_profiler = StartupProfiler().start()
+else:
+    _startup_profiler = None
+
 from collections import OrderedDict
-from typing import Tuple, Optional
+from types import ModuleType
+from typing import Callable, Dict, Tuple, Optional
 
 import argparse
+import importlib
 import streamlit as st
 
-import ui.intermediate
-import ui.basics
-import ui.interactive
-import ui.visualization
-import ui.utility
-import ui.extras
+from src.assets import get_asset
+from src.instrumentation import get_render_metrics
+from src.profiling import StartupProfiler
+from src.warmup import warm_assets, warm_up_once
 
 
+# pages are only imported when they are selected for the first time,
+# so starting the app doesn't pay for the plotting libraries of every page
 PAGES = OrderedDict({
-    "Basic Elements": ui.basics,
-    "Interactivity": ui.interactive,
-    "Utility Features": ui.utility,
-    "Visualization": ui.visualization,
-    "Intermediate Features": ui.intermediate,
-    "Undocumented Features": ui.extras
+    "Basic Elements": "ui.basics",
+    "Interactivity": "ui.interactive",
+    "Utility Features": "ui.utility",
+    "Visualization": "ui.visualization",
+    "Intermediate Features": "ui.intermediate",
+    "Undocumented Features": "ui.extras"
 })
 
 
-def main(target_section: Optional[str]) -> None:
+def get_page(title: str) -> ModuleType:
+    return importlib.import_module(PAGES[title])
+
+
+def main(target_section: Optional[str], profiler: Optional[StartupProfiler] = None) -> None:
     st.sidebar.title("Topics")
+    if profiler is not None:
+        profiler.mark("first element rendered")
     pages = list(PAGES.keys())
 
     if target_section is not None:
@@ -35,11 +52,9 @@ def main(target_section: Optional[str]) -> None:
     sel_page = st.sidebar.radio("", pages, index=page_idx)
     st.sidebar.markdown('-'*6)
 
-    page = PAGES[sel_page]
+    page = get_page(sel_page)
 
-    st.image(
-        "https://aws1.discourse-cdn.com/standard10/uploads/streamlit/original/2X/7/7cbf2ca198cd15eaaeb2e177a37b2c1c8c9a6e33.png",
-        use_column_width=True)
+    st.image(get_asset("streamlit_logo"), use_column_width=True)
     st.title(sel_page)
     st.sidebar.header("Section")
 
@@ -48,13 +63,72 @@ def main(target_section: Optional[str]) -> None:
     sections = list(section_map.keys())
     section_idx = sections.index(initial_section) if initial_section is not None else 0
     section = st.sidebar.radio("", options=sections, index=section_idx)
-    section_map[section]()  # call function set in the get_section() function on each page
+    metrics = get_render_metrics()
+    with metrics.measure(sel_page, section):
+        section_map[section]()  # call function set in the get_section() function on each page
+    metrics.export_if_due()
 #
 
+
+def profile_startup(target_section: Optional[str], output: str, profiler: StartupProfiler) -> None:
+    """
+    Render the selected section, then import all other pages, while recording the cost of every import
+    :param profiler: profiler started before app.py imported anything, its marks are relative to that point
+    """
+    profiler.mark("app imported")
+    try:
+        with profiler.phase("render"):
+            main(target_section, profiler)
+        profiler.mark("rendered")
+        for title in PAGES:
+            with profiler.phase(f"page: {title}"):
+                get_page(title)
+    finally:
+        profiler.stop()
+
+    print(profiler.format_table())
+    profiler.write_json(output)
+    print(f"\nFull profile written to {output}")
+
+
+def warm_up(with_server: bool) -> None:
+    """
+    Fill the caches of all pages, once per process
+    :param with_server: running with the streamlit server, i.e. in the script run of the first session: warm up in the
+        background without delaying it. In script mode, where rendering is a no-op, warm up before rendering the
+        page and additionally render every section once - with the server the elements would show up in the page of
+        the current user
+    """
+    def collect() -> Tuple[Dict[str, Callable], Dict[str, Callable]]:
+        warmups: Dict[str, Callable] = {"assets": warm_assets}
+        sections: Dict[str, Callable] = {}
+        for title in PAGES:
+            page = get_page(title)
+            if hasattr(page, "get_warmups"):
+                warmups.update({f"{title}/{name}": fn for name, fn in page.get_warmups().items()})
+            if not with_server:
+                sections.update({f"{title}/{name}": fn for name, fn in page.get_sections().items()})
+        return warmups, sections
+
+    warm_up_once(collect, background=with_server)
+
+
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Demonstrate capabilities of Streamlit")
+    # no abbreviations: --profile-startup has to be spelled out to start the profiler before the imports above
+    parser = argparse.ArgumentParser(description="Demonstrate capabilities of Streamlit", allow_abbrev=False)
     parser.add_argument('--section', dest="section", default=None, help='Path to the desired section (default: None)')
+    parser.add_argument('--profile-startup', dest="profile_startup", action='store_true',
+                        help='Record import cost per page and time to first rendered element')
+    parser.add_argument('--profile-output', dest="profile_output", default="startup_profile.json",
+                        help='JSON file for the results of --profile-startup (default: startup_profile.json)')
+    parser.add_argument('--warmup', dest="warmup", action='store_true',
+                        help='Fill the caches of all pages before rendering the first page')
     args = parser.parse_args()
 
     default_selection = args.section
-    main(default_selection)
+    if args.warmup:
+        warm_up(with_server=st._is_running_with_streamlit)
+    if args.profile_startup:
+        profile_startup(default_selection, args.profile_output, _startup_profiler)
+    else:
+        main(default_selection)
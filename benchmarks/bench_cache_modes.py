@@ -0,0 +1,68 @@
+"""Benchmark: latency of cache hits returning a dataframe, by size of the dataframe.
+
+Compares the three ways `src.caching.cache` deals with callers mutating a
+cached result:
+
+* "default": the result is hashed again on every hit, to detect mutations
+* "allow_output_mutation": no check, mutations silently change the cache
+* "frozen": the result's buffers are read-only, hits neither hash nor copy it
+
+Run from the repository root:
+
+    python -m benchmarks.bench_cache_modes
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.caching import cache
+
+ROWS = [1_000, 10_000, 100_000, 1_000_000, 5_000_000]
+HITS = 20
+
+MODES = {
+    "default": {},
+    "allow_output_mutation": {"allow_output_mutation": True},
+    "frozen": {"frozen": True},
+}
+
+
+def _frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "value": rng.standard_normal(rows),
+        "count": rng.integers(0, 1000, rows),
+        "category": pd.Categorical(rng.choice(["a", "b", "c", "d"], rows)),
+        "label": rng.choice(["alpha", "beta", "gamma"], rows).astype(object),
+    })
+
+
+def _hit_latency(options: dict, rows: int) -> float:
+    @cache(show_spinner=False, **options)
+    def load(n: int) -> pd.DataFrame:
+        return _frame(n)  # not a variable of the closure, which would be hashed on every call
+
+    load.clear()
+    load(rows)  # miss
+    times = []
+    for _ in range(HITS):
+        start = time.perf_counter()
+        load(rows)
+        times.append(time.perf_counter() - start)
+    load.clear()
+    return float(np.median(times))
+
+
+def main():
+    header = f"{'rows':>9} | {'size [MB]':>9} | " + " | ".join(f"{m + ' [ms]':>26}" for m in MODES)
+    print(header)
+    print('-' * len(header))
+    for rows in ROWS:
+        size = _frame(rows).memory_usage(deep=True).sum()
+        times = [_hit_latency(options, rows) * 1000 for options in MODES.values()]
+        print(f"{rows:>9} | {size / 1024 ** 2:>9.1f} | " + " | ".join(f"{t:>26.3f}" for t in times))
+
+
+if __name__ == "__main__":
+    main()
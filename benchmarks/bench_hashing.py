@@ -0,0 +1,86 @@
+"""Benchmark: cost of hashing dataframe and array arguments of cached functions.
+
+Compares, for growing inputs:
+
+* "pickle": digest of the pickled object, what `Hasher` falls back to for
+  types without a hash function
+* "fast": `FAST_HASH_FUNCS`, digests of the raw buffers / vectorized row hashes
+* "sampled": `sampled_hash_funcs()`, which only hashes a sample of inputs
+  above `SAMPLE_THRESHOLD_BYTES`
+* "st.cache": the hasher of `st.cache`, if the installed streamlit exposes it.
+  It only hashes a random sample of dataframes over 100k rows and arrays over
+  1M elements, so it beats "fast" on large inputs
+
+Run from the repository root:
+
+    python -m benchmarks.bench_hashing
+"""
+import hashlib
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.caching.hashing import Hasher, sampled_hash_funcs
+
+ROWS = [10_000, 100_000, 1_000_000, 5_000_000]
+REPEATS = 3
+
+
+def _frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "value": rng.standard_normal(rows),
+        "count": rng.integers(0, 1000, rows),
+        "category": pd.Categorical(rng.choice(["a", "b", "c", "d"], rows)),
+        "label": rng.choice(["alpha", "beta", "gamma"], rows).astype(object),
+    })
+
+
+def _array(rows: int) -> np.ndarray:
+    return np.random.default_rng(0).standard_normal((rows, 8))
+
+
+def _streamlit_hasher():
+    try:
+        from streamlit.hashing import _CodeHasher
+        hasher = _CodeHasher()
+        hasher.to_bytes(np.zeros(1))
+    except Exception:  # not installed, or a version with a different API
+        return None
+    return lambda obj: _CodeHasher().to_bytes(obj)
+
+
+def _best_of(fn, obj) -> float:
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(obj)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    hashers = {
+        "pickle": lambda obj: hashlib.sha1(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)).digest(),
+        "fast": Hasher().digest,
+        "sampled": Hasher(sampled_hash_funcs()).digest,
+    }
+    st_hasher = _streamlit_hasher()
+    if st_hasher is not None:
+        hashers["st.cache"] = st_hasher
+
+    header = f"{'input':<10} | {'rows':>9} | {'size [MB]':>9} | " + " | ".join(f"{n + ' [ms]':>14}" for n in hashers)
+    print(header)
+    print('-' * len(header))
+    for make, kind in ((_frame, "DataFrame"), (_array, "ndarray")):
+        for rows in ROWS:
+            obj = make(rows)
+            size = obj.memory_usage(deep=True).sum() if isinstance(obj, pd.DataFrame) else obj.nbytes
+            times = [_best_of(fn, obj) * 1000 for fn in hashers.values()]
+            print(f"{kind:<10} | {rows:>9} | {size / 1024 ** 2:>9.1f} | " + " | ".join(f"{t:>14.1f}" for t in times))
+
+
+if __name__ == "__main__":
+    main()
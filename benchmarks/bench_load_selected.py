@@ -0,0 +1,73 @@
+"""Benchmark: parallel loading of several large CSV files with `load_selected`.
+
+Writes a set of large CSV files and loads them with an increasing number of
+workers, in a thread pool and in a process pool. The loader cache and the
+sidecars (kept in the temporary folder of the benchmark) are cleared before
+every run, so each run parses all files.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_load_selected
+"""
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import ui.components.loaders as loaders
+from ui.components.data_selector import load_selected
+from ui.components.sidecar import configure_sidecars
+
+NUM_FILES = 8
+ROWS_PER_FILE = 500_000
+
+
+def _write_files(folder: Path):
+    rng = np.random.default_rng(42)
+    files = []
+    for i in range(NUM_FILES):
+        df = pd.DataFrame({
+            "id": np.arange(ROWS_PER_FILE),
+            "value": rng.standard_normal(ROWS_PER_FILE),
+            "category": rng.choice(["a", "b", "c", "d"], ROWS_PER_FILE),
+            "count": rng.integers(0, 1000, ROWS_PER_FILE),
+        })
+        name = f"part_{i}.csv"
+        df.to_csv(folder / name, index=False)
+        files.append(name)
+    return files
+
+
+def main():
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        # worker processes read the directory from the environment when they import the loaders
+        sidecar_dir = folder / "sidecars"
+        os.environ["SIDECAR_CACHE_DIR"] = str(sidecar_dir)
+        sidecars = configure_sidecars(sidecar_dir)
+        print(f"writing {NUM_FILES} files with {ROWS_PER_FILE} rows each ...")
+        files = _write_files(folder)
+
+        print(f"{'workers':>7} | {'threads [s]':>11} | {'processes [s]':>13}")
+        print('-' * 38)
+        for workers in worker_counts:
+            timings = []
+            for use_processes in (False, True):
+                loaders.clear_cache()
+                sidecars.clear()
+                start = time.perf_counter()
+                # an absolute folder replaces the 'data' directory
+                result = load_selected(str(folder), files, max_workers=workers, use_processes=use_processes)
+                timings.append(time.perf_counter() - start)
+                assert len(result.data) == NUM_FILES * ROWS_PER_FILE
+            print(f"{workers:>7} | {timings[0]:>11.2f} | {timings[1]:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
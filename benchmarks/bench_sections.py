@@ -0,0 +1,174 @@
+"""Benchmark: render every section of every page in script mode.
+
+Without the streamlit server (`st._is_running_with_streamlit == False`) all
+elements are no-ops and widgets return their default values, so each section
+can be called directly, like `python app.py --section Page/Section` does.
+
+Every section is rendered `--repeats` times for timing. The first render is
+reported separately ("cold"), as it fills the `st.cache` of the section; the
+median and minimum are taken over the remaining renders. One more render runs
+under `tracemalloc` to record the peak memory and the number of memory blocks
+allocated during the render and still alive after it. It isn't part of the
+timing, as tracing slows down the allocations considerably. Sections raising an exception (e.g. when a
+dataset can't be downloaded) are recorded with their error.
+
+Run from the repository root, first to record a baseline, later to compare
+against it:
+
+    python -m benchmarks.bench_sections run --output section_baseline.json
+    python -m benchmarks.bench_sections compare section_baseline.json
+
+`compare` exits with status 1 if any section got slower or needs more memory
+than allowed by `--threshold`.
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+import app
+
+# changes below these absolute differences are noise, no matter how large relative to the baseline
+MIN_TIME_DELTA = 0.002  # seconds
+MIN_MEMORY_DELTA = 64 * 1024  # bytes
+COMPARED_METRICS = {"median_s": MIN_TIME_DELTA, "peak_bytes": MIN_MEMORY_DELTA}
+
+
+def iter_sections(only: Optional[Sequence[str]] = None) -> Iterator[Tuple[str, Callable]]:
+    """All sections as ("Page/Section", function), optionally restricted to the given names or pages"""
+    for title in app.PAGES:
+        for section, fn in app.get_page(title).get_sections().items():
+            name = f"{title}/{section}"
+            if not only or name in only or title in only:
+                yield name, fn
+
+
+def _trace(fn: Callable) -> Tuple[int, int]:
+    gc.collect()
+    # Only blocks allocated after start() are traced, so the final snapshot alone holds the blocks
+    # allocated by the render and still alive. Snapshots taken while tracing would count in the peak.
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    after = after.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    retained = sum(stat.count for stat in after.statistics("filename"))
+    return peak, retained
+
+
+def measure_section(fn: Callable, repeats: int) -> Dict:
+    times = []
+    try:
+        for _ in range(max(2, repeats)):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        peak, retained = _trace(fn)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    warm = times[1:]
+    return {
+        "cold_s": times[0],
+        "median_s": statistics.median(warm),
+        "min_s": min(warm),
+        "peak_bytes": peak,
+        "retained_blocks": retained,
+    }
+
+
+def run(repeats: int, only: Optional[Sequence[str]] = None) -> Dict:
+    results = {}
+    for name, fn in iter_sections(only):
+        results[name] = measure_section(fn, repeats)
+        r = results[name]
+        if "error" in r:
+            print(f"{name:<50} | failed: {r['error']}")
+        else:
+            print(f"{name:<50} | {r['cold_s'] * 1000:>9.1f} | {r['median_s'] * 1000:>11.1f} | "
+                  f"{r['peak_bytes'] / 1024:>9.0f} | {r['retained_blocks']:>15}")
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "repeats": repeats,
+        "sections": results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> int:
+    """Print the change of every section and return the number of regressions"""
+    regressions = 0
+    base_sections, cur_sections = baseline["sections"], current["sections"]
+    print(f"{'section':<50} | {'metric':<10} | {'baseline':>12} | {'current':>12} | {'change':>7}")
+    print('-' * 103)
+    for name, cur in cur_sections.items():
+        base = base_sections.get(name)
+        if base is None:
+            print(f"{name:<50} | new section")
+            continue
+        if "error" in cur or "error" in base:
+            if "error" in cur and "error" not in base:
+                regressions += 1
+                print(f"{name:<50} | REGRESSION: {cur['error']}")
+            continue
+        for metric, min_delta in COMPARED_METRICS.items():
+            delta = cur[metric] - base[metric]
+            change = delta / base[metric] if base[metric] else 0.0
+            regressed = change > threshold and delta > min_delta
+            regressions += regressed
+            print(f"{name:<50} | {metric:<10} | {base[metric]:>12.4g} | {cur[metric]:>12.4g} | {change:>+7.1%}"
+                  + ("  REGRESSION" if regressed else ""))
+    for name in base_sections.keys() - cur_sections.keys():
+        print(f"{name:<50} | missing in current run")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render all sections in script mode and compare with a baseline")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="measure all sections and write the results")
+    run_parser.add_argument("--output", default="section_baseline.json", help="JSON file for the results")
+
+    compare_parser = commands.add_parser("compare", help="measure all sections and compare with a baseline")
+    compare_parser.add_argument("baseline", help="JSON file written by `run`")
+    compare_parser.add_argument("--current", default=None,
+                                help="JSON file written by `run` to compare, instead of measuring again")
+    compare_parser.add_argument("--threshold", type=float, default=0.2,
+                                help="allowed relative increase of time and memory (default: 0.2)")
+
+    for p in (run_parser, compare_parser):
+        p.add_argument("--repeats", type=int, default=5, help="renders per section (default: 5)")
+        p.add_argument("--only", nargs="*", default=None, help="restrict to these pages or Page/Section names")
+    args = parser.parse_args()
+
+    if args.command == "compare" and args.current is not None:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        print(f"{'section':<50} | {'cold [ms]':>9} | {'median [ms]':>11} | {'peak [KB]':>9} | {'retained blocks':>15}")
+        print('-' * 106)
+        current = run(args.repeats, args.only)
+
+    if args.command == "run":
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print()
+        regressions = compare(baseline, current, args.threshold)
+        print(f"\n{regressions} regression(s) above {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Micro-benchmark: session lookup cost vs. number of concurrent sessions.
+
+Compares the original linear scan over `Server._session_info_by_id` with the
+indexed `SessionResolver`. The resolver's cost should stay flat as the number
+of sessions grows.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_session_lookup
+"""
+import random
+import timeit
+
+from ui.session_state.session_resolver import SessionResolver, _session_matches
+
+SESSION_COUNTS = [1, 10, 100, 1000, 5000]
+LOOKUPS = 2000
+
+
+class FakeSession(object):
+    def enqueue(self, msg):
+        pass
+
+
+class FakeSessionInfo(object):
+    def __init__(self, session):
+        self.session = session
+
+
+class FakeReportContext(object):
+    def __init__(self, session):
+        self.enqueue = session.enqueue
+
+
+def linear_scan(session_infos, ctx):
+    this_session = None
+    for session_info in session_infos.values():
+        s = session_info.session
+        if _session_matches(s, ctx):
+            this_session = s
+    return this_session
+
+
+def main():
+    print(f"{'sessions':>8} | {'scan [us]':>10} | {'resolver [us]':>13}")
+    print('-' * 38)
+    for n in SESSION_COUNTS:
+        sessions = [FakeSession() for _ in range(n)]
+        session_infos = {i: FakeSessionInfo(s) for i, s in enumerate(sessions)}
+        contexts = [FakeReportContext(random.choice(sessions)) for _ in range(LOOKUPS)]
+
+        resolver = SessionResolver(lambda: session_infos.values())
+        resolver.resolve(contexts[0])  # first lookup fills the index
+
+        scan_t = timeit.timeit(lambda: [linear_scan(session_infos, c) for c in contexts], number=1)
+        resolve_t = timeit.timeit(lambda: [resolver.resolve(c) for c in contexts], number=1)
+
+        print(f"{n:>8} | {scan_t / LOOKUPS * 1e6:>10.2f} | {resolve_t / LOOKUPS * 1e6:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
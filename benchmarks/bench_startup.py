@@ -0,0 +1,46 @@
+"""Benchmark: cold start of `app.py` with lazily vs. eagerly imported pages.
+
+Every measurement runs in a fresh interpreter, so nothing is cached in
+`sys.modules`. "eager" imports every page module up front, like `app.py` used
+to do; "lazy" only imports `app` and the first page, which is what rendering
+the default page needs now.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup
+"""
+import statistics
+import subprocess
+import sys
+
+REPEATS = 5
+
+SNIPPETS = {
+    "eager (all pages)": "import app\nfor title in app.PAGES: app.get_page(title)",
+    "lazy (first page)": "import app\napp.get_page(next(iter(app.PAGES)))",
+}
+
+TIMER = """
+import time
+_start = time.perf_counter()
+{snippet}
+print(time.perf_counter() - _start)
+"""
+
+
+def _measure(snippet: str) -> float:
+    out = subprocess.run([sys.executable, "-c", TIMER.format(snippet=snippet)],
+                         check=True, capture_output=True, text=True).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'mode':<18} | {'median [ms]':>11} | {'min [ms]':>8}")
+    print('-' * 43)
+    for name, snippet in SNIPPETS.items():
+        times = [_measure(snippet) for _ in range(REPEATS)]
+        print(f"{name:<18} | {statistics.median(times) * 1000:>11.1f} | {min(times) * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
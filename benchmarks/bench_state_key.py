@@ -0,0 +1,49 @@
+"""Benchmark: key derivation for `st.State()` calls without an explicit key.
+
+Compares the original `inspect.stack()` based derivation with the frame walking
+one at different call stack depths. Both must produce identical keys.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_state_key
+"""
+import collections
+import timeit
+
+import ui.session_state.st_state_patch as st_state_patch
+
+STACK_DEPTHS = [10, 50, 200]
+CALLS = 200
+
+
+def _at_depth(depth, fn):
+    if depth <= 0:
+        return fn()
+    return _at_depth(depth - 1, fn)
+
+
+def _derive_keys(mode):
+    st_state_patch.KEY_DERIVATION = mode
+    key_counts = collections.defaultdict(int)
+    return [st_state_patch._figure_out_key(key_counts) for _ in range(CALLS)]
+
+
+def main():
+    print(f"{'depth':>5} | {'inspect [us]':>12} | {'fast [us]':>9} | {'speedup':>7}")
+    print('-' * 44)
+    try:
+        for depth in STACK_DEPTHS:
+            assert _at_depth(depth, lambda: _derive_keys("inspect")) == \
+                _at_depth(depth, lambda: _derive_keys("fast"))
+
+            inspect_t = timeit.timeit(lambda: _at_depth(depth, lambda: _derive_keys("inspect")), number=1)
+            fast_t = timeit.timeit(lambda: _at_depth(depth, lambda: _derive_keys("fast")), number=1)
+
+            print(f"{depth:>5} | {inspect_t / CALLS * 1e6:>12.1f} | {fast_t / CALLS * 1e6:>9.1f} "
+                  f"| {inspect_t / fast_t:>6.0f}x")
+    finally:
+        st_state_patch.KEY_DERIVATION = "fast"
+
+
+if __name__ == "__main__":
+    main()
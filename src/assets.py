@@ -0,0 +1,122 @@
+"""Named images and other static assets used by the pages
+
+Remote assets are downloaded only once per process and kept in memory, with a copy on disk as fallback for later
+processes (and for running without network access). Assets bundled with the repository are read from disk once.
+"""
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+BUNDLED_DIR = Path("data/external")
+CACHE_DIR = Path(os.environ.get("ASSET_CACHE_DIR", "data/interim/assets"))
+
+
+@dataclass(frozen=True)
+class Asset:
+    url: Optional[str] = None  # where to download the asset from
+    bundled: Optional[Path] = None  # local copy shipped with the repository
+
+
+ASSETS: Dict[str, Asset] = {
+    "streamlit_logo": Asset(
+        url="https://aws1.discourse-cdn.com/standard10/uploads/streamlit/original/2X/7/"
+            "7cbf2ca198cd15eaaeb2e177a37b2c1c8c9a6e33.png"),
+    "ceiling_cat": Asset(url="https://www.dogalize.com/wp-content/uploads/2018/03/ceiling-cat.jpg"),
+    "embedded_image": Asset(bundled=BUNDLED_DIR/"embedded_image.jpg"),
+    "applause": Asset(bundled=BUNDLED_DIR/"applause7.mp3"),
+    "hash_error": Asset(
+        url="https://aws1.discourse-cdn.com/standard10/uploads/streamlit/optimized/2X/8/"
+            "8e43b6b1b88db7d0759adfe163ac1ebe09fcd3f8_2_690x401.png"),
+}
+
+
+class AssetManager:
+    def __init__(self, assets: Optional[Dict[str, Asset]] = None, cache_dir: Union[str, Path] = CACHE_DIR,
+                 timeout: float = 10, retry_after: float = 60):
+        """
+        Serve assets by name, from memory, a bundled file, the on-disk cache or - only if nothing else works - the web
+        :param assets: registered assets, by default `ASSETS`
+        :param cache_dir: folder for downloaded assets
+        :param timeout: timeout in seconds for downloads
+        :param retry_after: seconds to wait after a failed download before trying again
+        """
+        self.assets = dict(ASSETS if assets is None else assets)
+        self.cache_dir = Path(cache_dir)
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._failed_at: Dict[str, float] = {}
+        self._data: Dict[str, bytes] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, url: Optional[str] = None, bundled: Optional[Union[str, Path]] = None) -> None:
+        with self._lock:
+            self.assets[name] = Asset(url, Path(bundled) if bundled is not None else None)
+            self._data.pop(name, None)
+
+    def _cache_path(self, name: str, asset: Asset) -> Path:
+        suffix = Path(urllib.request.urlparse(asset.url).path).suffix if asset.url else ""
+        return self.cache_dir/f"{name}{suffix}"
+
+    def _download(self, name: str, asset: Asset) -> bytes:
+        with urllib.request.urlopen(asset.url, timeout=self.timeout) as response:
+            data = response.read()
+        path = self._cache_path(name, asset)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return data
+
+    def _load(self, name: str, asset: Asset) -> Optional[bytes]:
+        for path in (asset.bundled, self._cache_path(name, asset) if asset.url else None):
+            if path is not None and path.is_file():
+                return path.read_bytes()
+        if asset.url is not None:
+            failed_at = self._failed_at.get(name)
+            if failed_at is not None and time.monotonic() - failed_at < self.retry_after:
+                return None  # don't block every rerun on an unreachable network
+            try:
+                return self._download(name, asset)
+            except OSError:
+                self._failed_at[name] = time.monotonic()
+                return None
+        return None
+
+    def get(self, name: str) -> Union[bytes, str]:
+        """
+        Content of an asset, loaded only once
+        :param name: name the asset is registered with
+        :return: the asset's bytes, or its URL if it isn't available locally and can't be downloaded right now
+        """
+        data = self._data.get(name)
+        if data is not None:
+            return data
+
+        asset = self.assets[name]
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:  # download each asset only once, even if requested by several sessions at the same time
+            data = self._data.get(name)
+            if data is None:
+                data = self._load(name, asset)
+                if data is None:
+                    if asset.url is None:
+                        raise FileNotFoundError(f"Asset '{name}' not found at {asset.bundled}")
+                    return asset.url  # let the browser fetch it, download again later
+                self._data[name] = data
+        return data
+
+
+_assets = AssetManager()
+
+
+def get_asset(name: str) -> Union[bytes, str]:
+    """Content of the asset registered under `name`, see `AssetManager.get`"""
+    return _assets.get(name)
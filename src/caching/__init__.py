@@ -0,0 +1,4 @@
+from src.caching.core import CachedFunction, CacheStats, FunctionCache, cache, clear_all, footprint, stats_snapshot
+from src.caching.disk import DiskStore, get_disk_store
+from src.caching.freezing import freeze
+from src.caching.hashing import FAST_HASH_FUNCS, Hasher, UnhashableTypeError, sampled_hash_funcs
@@ -0,0 +1,468 @@
+"""Memoization of functions with the semantics of `st.cache`, bounded by the memory the results take
+
+Like `st.cache`, entries are shared by all definitions of a function with the same name and body - e.g. a cached
+function defined inside a section is redefined on every rerun, but keeps its cache. The arguments are hashed by
+content, together with the variables the function reads from its closure and its module's globals, and unless `allow_output_mutation` is set, a hit checks that the returned object wasn't mutated.
+With `frozen`, results are made read-only instead, see `src.caching.freezing`, so hits skip that check.
+On top of `ttl` and `max_entries`, `max_bytes` limits the estimated size of all results of a function: the least
+recently used entries are evicted until the results fit.
+With `persist`, results are also stored in a `DiskStore` shared by all processes on the node, see `src.caching.disk`.
+With `stale_while_revalidate`, an expired result is still returned for that many seconds after its `ttl`, while a
+background thread computes the new one, which then replaces it. Callers only wait for results older than that.
+Concurrent calls with the same arguments are coalesced: one of them computes the result, the others wait for it and
+get the same result, or the same exception. Exits which aren't errors, like the `RerunException` of streamlit when the
+computing session's user interacts, aren't passed on; one of the waiting calls computes the result instead.
+"""
+import collections
+import functools
+import inspect
+import threading
+import time
+import warnings
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+import streamlit as st
+
+from src.caching.disk import DiskStore, get_disk_store
+from src.caching.freezing import freeze, frozen_view
+from src.caching.hashing import HashFuncs, Hasher, function_dependencies, function_key, referenced_globals
+from src.sizing import deep_sizeof
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    size: int  # estimated bytes of `value`
+    created_at: float
+    output_hash: Optional[bytes] = None  # hash of `value` when it was stored, to detect mutations
+    compute_seconds: float = 0.0  # how long it took to compute `value`, i.e. what a hit saves
+
+
+@dataclass
+class CacheStats:
+    name: str
+    hits: int = 0
+    misses: int = 0
+    disk_hits: int = 0  # misses in memory, which were loaded from the disk tier
+    evictions: int = 0  # results removed to stay within max_bytes / max_entries
+    expirations: int = 0  # results removed because their ttl (and stale_while_revalidate) was over
+    stale_hits: int = 0  # hits returning an expired result while it's refreshed in the background
+    refresh_errors: int = 0  # background refreshes which raised, the stale result is kept until its cutoff
+    coalesced: int = 0  # misses which waited for the same result being computed by another thread
+    hash_seconds: float = 0.0  # time spent hashing arguments (and results, to detect mutations)
+    compute_seconds: float = 0.0  # time spent computing results on misses
+    saved_seconds: float = 0.0  # compute time of the results returned by hits
+    entries: int = 0
+    bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+    def merge(self, other: "CacheStats") -> "CacheStats":
+        return CacheStats(self.name, **{f: getattr(self, f) + getattr(other, f)
+                                        for f in self.__dataclass_fields__ if f != "name"})
+
+
+# result of a computation which was left without an error, e.g. by a rerun of the computing session's script
+_ABANDONED = object()
+
+
+class FunctionCache:
+    def __init__(self, name: str, max_bytes: Optional[int] = None, max_entries: Optional[int] = None,
+                 ttl: Optional[float] = None, stale_while_revalidate: Optional[float] = None,
+                 sizeof: Callable[[Any], int] = deep_sizeof, clock: Callable[[], float] = time.monotonic):
+        """
+        Results of one cached function, least recently used first
+        :param name: name of the function, for reporting
+        :param max_bytes: budget for the estimated size of all results, `None` for no limit
+        :param max_entries: maximum number of results, `None` for no limit
+        :param ttl: seconds a result stays valid, `None` for no limit
+        :param stale_while_revalidate: seconds after `ttl` during which an expired result is still returned as stale,
+            `None` to remove results as soon as their `ttl` is over
+        :param sizeof: estimates the size of a result in bytes
+        :param clock: monotonic time source, replaceable for testing
+        """
+        self.name = name
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self._sizeof = sizeof
+        self._clock = clock
+        self._entries: "collections.OrderedDict[Hashable, CacheEntry]" = collections.OrderedDict()
+        self._bytes = 0
+        self._in_flight: Dict[Hashable, Future] = {}  # results being computed, by their key
+        self._lock = threading.Lock()
+        self._stats = CacheStats(name)
+
+    def configure(self, max_bytes: Optional[int], max_entries: Optional[int], ttl: Optional[float],
+                  stale_while_revalidate: Optional[float] = None) -> None:
+        with self._lock:
+            self.max_bytes, self.max_entries, self.ttl = max_bytes, max_entries, ttl
+            self.stale_while_revalidate = stale_while_revalidate
+            self._evict()
+
+    def get(self, key: Hashable) -> Tuple[Optional[CacheEntry], bool]:
+        """
+        Look up a result
+        :return: the result, or `None` if there is no valid one, and whether it's stale, i.e. its `ttl` is over but it's
+            still within `stale_while_revalidate`
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            stale = False
+            if self.ttl is not None:
+                age = self._clock() - entry.created_at
+                stale = age > self.ttl
+                if stale and (self.stale_while_revalidate is None or age > self.ttl + self.stale_while_revalidate):
+                    self._remove(key)
+                    self._stats.expirations += 1
+                    return None, False
+            self._entries.move_to_end(key)
+            return entry, stale
+
+    def claim(self, key: Hashable) -> Tuple[Future, bool]:
+        """
+        Claim the computation of a result, so concurrent callers wait for it instead of computing it as well
+        :return: the future of the result, and whether the caller claimed it, i.e. has to compute the result and pass it
+            to `release`; otherwise another thread is computing it already
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future, False
+            future = self._in_flight[key] = Future()
+            return future, True
+
+    def release(self, key: Hashable, value: Any = None, error: Optional[Exception] = None) -> None:
+        """
+        Finish a computation claimed with `claim`, handing its result or error to all waiting callers
+        Pass `_ABANDONED` as `value` if there's neither, the callers then claim the computation again.
+        """
+        with self._lock:
+            future = self._in_flight.pop(key)
+        if error is None:
+            future.set_result(value)
+        else:
+            future.set_exception(error)
+
+    def put(self, key: Hashable, value: Any, output_hash: Optional[bytes] = None,
+            compute_seconds: float = 0.0, age: float = 0.0) -> bool:
+        """
+        Store a result, evicting the least recently used results if necessary
+        :param age: seconds since the result was computed, if it was computed earlier, e.g. by another process
+        :return: False if the result alone is larger than `max_bytes` and therefore wasn't stored
+        """
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return False
+            self._entries[key] = CacheEntry(value, size, self._clock() - age, output_hash, compute_seconds)
+            self._bytes += size
+            self._evict()
+        return True
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key: Hashable) -> CacheEntry:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        return entry
+
+    def _evict(self) -> None:
+        while self._entries and ((self.max_bytes is not None and self._bytes > self.max_bytes) or
+                                 (self.max_entries is not None and len(self._entries) > self.max_entries)):
+            self._remove(next(iter(self._entries)))
+            self._stats.evictions += 1
+
+    def record_hit(self, entry: CacheEntry, hash_seconds: float, stale: bool = False) -> None:
+        with self._lock:
+            self._stats.hits += 1
+            self._stats.stale_hits += stale
+            self._stats.hash_seconds += hash_seconds
+            self._stats.saved_seconds += entry.compute_seconds
+
+    def record_coalesced(self, hash_seconds: float) -> None:
+        with self._lock:
+            self._stats.coalesced += 1
+            self._stats.hash_seconds += hash_seconds
+
+    def record_refresh_error(self) -> None:
+        with self._lock:
+            self._stats.refresh_errors += 1
+
+    def record_miss(self, hash_seconds: float, compute_seconds: float, disk_hit: bool = False) -> None:
+        with self._lock:
+            self._stats.misses += 1
+            self._stats.disk_hits += disk_hit
+            self._stats.hash_seconds += hash_seconds
+            self._stats.compute_seconds += compute_seconds
+
+    def stats(self) -> CacheStats:
+        """Copy of the current statistics"""
+        with self._lock:
+            return replace(self._stats, entries=len(self._entries), bytes=self._bytes)
+
+    def footprint(self) -> int:
+        """Estimated bytes of all stored results"""
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+# caches of all cached functions, by name and body of the function
+_caches: Dict[str, FunctionCache] = {}
+_caches_lock = threading.Lock()
+
+
+def _get_function_cache(key: str, name: str, max_bytes: Optional[int], max_entries: Optional[int],
+                        ttl: Optional[float], stale_while_revalidate: Optional[float],
+                        clock: Callable[[], float]) -> FunctionCache:
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = FunctionCache(name, max_bytes, max_entries, ttl, stale_while_revalidate,
+                                                 clock=clock)
+            return cache
+    # the latest definition decides about the limits
+    limits = (max_bytes, max_entries, ttl, stale_while_revalidate)
+    if (cache.max_bytes, cache.max_entries, cache.ttl, cache.stale_while_revalidate) != limits:
+        cache.configure(*limits)
+    return cache
+
+
+class CachedFunction:
+    def __init__(self, func: Callable, max_bytes: Optional[int] = None, ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None, hash_funcs: Optional[HashFuncs] = None,
+                 allow_output_mutation: bool = False, show_spinner: bool = True,
+                 persist: Union[bool, str, Path, DiskStore] = False, stale_while_revalidate: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, frozen: bool = False):
+        """Wrapper of a cached function, see `cache`"""
+        functools.update_wrapper(self, func)
+        self._func = func
+        self._signature = inspect.signature(func)
+        self._hasher = Hasher(hash_funcs)
+        self.allow_output_mutation = allow_output_mutation
+        self.frozen = frozen
+        self.show_spinner = show_spinner
+        self._key = function_key(func)
+        code = getattr(func, "__code__", None)
+        self._global_names = referenced_globals(code) if code is not None else ()
+        self._cache = _get_function_cache(self._key, func.__qualname__, max_bytes, max_entries, ttl,
+                                          stale_while_revalidate, clock)
+        if isinstance(persist, DiskStore):
+            self._disk: Optional[DiskStore] = persist
+        elif persist is True:
+            self._disk = get_disk_store()
+        elif persist:
+            self._disk = get_disk_store(persist)
+        else:
+            self._disk = None
+
+    def _arguments_key(self, args: tuple, kwargs: dict) -> bytes:
+        # f(1) and f(n=1) are the same call
+        bound = self._signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        dependencies = function_dependencies(self._func, self._global_names)
+        return self._hasher.digest((self._key, list(bound.arguments.items()), dependencies))
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        key = self._arguments_key(args, kwargs)
+        entry, stale = self._cache.get(key)
+        if entry is not None:
+            if self.frozen or self.allow_output_mutation or self._hasher.digest(entry.value) == entry.output_hash:
+                if stale and self._cache.claim(key)[1]:
+                    threading.Thread(target=self._refresh, args=(key, args, kwargs), daemon=True,
+                                     name=f"refresh {self._func.__qualname__}").start()
+                self._cache.record_hit(entry, time.perf_counter() - start, stale)
+                return self._output(entry.value)
+            warnings.warn(f"The return value of {self._func.__qualname__}() was mutated after it was cached, "
+                          f"computing it again. Pass allow_output_mutation=True if that's intended.")
+            self._cache.pop(key)
+        hash_seconds = time.perf_counter() - start
+
+        future, claimed = self._cache.claim(key)
+        if not claimed:
+            self._cache.record_coalesced(hash_seconds)
+            while not claimed:
+                value = self._wait(future)
+                if value is not _ABANDONED:
+                    return self._output(value)
+                future, claimed = self._cache.claim(key)
+        entry, stale = self._cache.get(key)
+        if entry is not None and not stale:  # stored by another thread between the lookup and the claim
+            self._cache.release(key, entry.value)
+            self._cache.record_hit(entry, hash_seconds)
+            return self._output(entry.value)
+
+        try:
+            value, compute_seconds, age, disk_hit = self._load(key, args, kwargs, self.show_spinner)
+            start = time.perf_counter()
+            value, output_hash = self._prepare(value)
+            hash_seconds += time.perf_counter() - start
+        except Exception as e:
+            self._cache.release(key, error=e)
+            raise
+        except BaseException:
+            # not an error of the function, but e.g. a rerun of this session's script: don't rerun or stop the
+            # sessions waiting for the result, one of them computes it instead
+            self._cache.release(key, _ABANDONED)
+            raise
+        self._cache.record_miss(hash_seconds, compute_seconds, disk_hit)
+        self._cache.put(key, value, output_hash, compute_seconds, age)  # before releasing, so later calls hit
+        self._cache.release(key, value)
+        return self._output(value)
+
+    def _prepare(self, value: Any) -> Tuple[Any, Optional[bytes]]:
+        """Result as it's stored, and its hash to detect mutations, if they need to be detected"""
+        if self.frozen:
+            return freeze(value), None
+        if self.allow_output_mutation:
+            return value, None
+        return value, self._hasher.digest(value)
+
+    def _output(self, value: Any) -> Any:
+        return frozen_view(value) if self.frozen else value
+
+    def _wait(self, future: Future) -> Any:
+        if self.show_spinner:
+            with st.spinner(f"Waiting for {self._func.__qualname__}(...), computed by another session."):
+                return future.result()
+        return future.result()
+
+    def _refresh(self, key: bytes, args: tuple, kwargs: dict) -> None:
+        # runs in a background thread, without the report context of the session, so no spinner
+        try:
+            value, compute_seconds, age, _ = self._load(key, args, kwargs, show_spinner=False)
+            value, output_hash = self._prepare(value)
+        except Exception as e:
+            warnings.warn(f"Refreshing the result of {self._func.__qualname__}() failed, "
+                          f"the stale result is kept: {e!r}")
+            self._cache.record_refresh_error()
+            self._cache.release(key, error=e)  # calls waiting for the refresh get the error
+            return
+        except BaseException:
+            self._cache.release(key, _ABANDONED)
+            raise
+        self._cache.put(key, value, output_hash, compute_seconds, age)  # replaces the stale result at once
+        self._cache.release(key, value)
+
+    def _load(self, key: bytes, args: tuple, kwargs: dict, show_spinner: bool) -> tuple:
+        """Compute a result or load it from the disk tier; returns value, compute seconds, age and if it was loaded"""
+        if self._disk is None:
+            value, compute_seconds = self._compute(args, kwargs, show_spinner)
+            return value, compute_seconds, 0.0, False
+        return self._load_or_compute(key.hex(), args, kwargs, show_spinner)
+
+    def _compute(self, args: tuple, kwargs: dict, show_spinner: bool) -> tuple:
+        start = time.perf_counter()
+        if show_spinner:
+            with st.spinner(f"Running {self._func.__qualname__}(...)."):
+                value = self._func(*args, **kwargs)
+        else:
+            value = self._func(*args, **kwargs)
+        return value, time.perf_counter() - start
+
+    def _load_or_compute(self, disk_key: str, args: tuple, kwargs: dict, show_spinner: bool) -> tuple:
+        # the lock makes other processes wait for this one's result instead of computing it as well
+        with self._disk.lock(disk_key):
+            entry = self._disk.get(disk_key, max_age=self._cache.ttl)
+            if entry is not None:
+                return entry.value, 0.0, max(0.0, time.time() - entry.created_at), True
+            value, compute_seconds = self._compute(args, kwargs, show_spinner)
+            self._disk.put(disk_key, value)
+        return value, compute_seconds, 0.0, False
+
+    def footprint(self) -> int:
+        """Estimated bytes of all cached results of the function"""
+        return self._cache.footprint()
+
+    def stats(self) -> CacheStats:
+        return self._cache.stats()
+
+    def clear(self) -> None:
+        """Remove the results from memory; results on disk are kept for other processes"""
+        self._cache.clear()
+
+
+def cache(func: Optional[Callable] = None, *, max_bytes: Optional[int] = None, ttl: Optional[float] = None,
+          max_entries: Optional[int] = None, hash_funcs: Optional[HashFuncs] = None,
+          allow_output_mutation: bool = False, show_spinner: bool = True,
+          persist: Union[bool, str, Path, DiskStore] = False, stale_while_revalidate: Optional[float] = None,
+          clock: Callable[[], float] = time.monotonic, frozen: bool = False):
+    """
+    Cache the results of a function, like `st.cache`, but limited by the memory the results take
+    Usable as `@cache`, `@cache(max_bytes=...)` or `cache(func, max_bytes=...)`.
+    :param func: function to cache
+    :param max_bytes: budget for the estimated size of all results of the function; the least recently used results
+        are evicted to stay below it, results larger than the whole budget aren't cached at all
+    :param ttl: seconds a result stays valid
+    :param max_entries: maximum number of results, the least recently used are evicted
+    :param hash_funcs: custom hash functions for argument types, by type or fully qualified type name
+    :param allow_output_mutation: skip checking that a returned result wasn't mutated by the caller
+    :param show_spinner: show a spinner while computing a result
+    :param persist: additionally store results on disk, shared by all processes: `True` for the default directory,
+        a directory or a `DiskStore`
+    :param stale_while_revalidate: seconds after `ttl` during which an expired result is still returned right away,
+        while it's recomputed in a background thread; older results are recomputed before returning, so this is the
+        maximum staleness on top of `ttl`
+    :param clock: monotonic time source for `ttl`, replaceable for testing; only used by the first definition
+    :param frozen: make results read-only instead of checking on every hit that they weren't mutated: arrays and
+        the columns of dataframes get read-only buffers, lists, dicts and sets are returned as tuples,
+        `MappingProxyType`s and frozensets; hits neither hash the result nor copy its data
+    :return: the cached function, or a decorator if `func` isn't given
+    """
+    def decorator(f: Callable) -> CachedFunction:
+        return CachedFunction(f, max_bytes=max_bytes, ttl=ttl, max_entries=max_entries, hash_funcs=hash_funcs,
+                              allow_output_mutation=allow_output_mutation, show_spinner=show_spinner,
+                              persist=persist, stale_while_revalidate=stale_while_revalidate, clock=clock,
+                              frozen=frozen)
+
+    return decorator(func) if func is not None else decorator
+
+
+def footprint() -> Dict[str, int]:
+    """Estimated bytes of the cached results per function"""
+    with _caches_lock:
+        caches = list(_caches.values())
+    result: Dict[str, int] = {}
+    for c in caches:
+        result[c.name] = result.get(c.name, 0) + c.footprint()
+    return result
+
+
+def stats_snapshot() -> List[CacheStats]:
+    """Statistics of all cached functions; definitions with the same name but different bodies are summed up"""
+    with _caches_lock:
+        caches = list(_caches.values())
+    merged: Dict[str, CacheStats] = {}
+    for c in caches:
+        stats = c.stats()
+        merged[c.name] = merged[c.name].merge(stats) if c.name in merged else stats
+    return sorted(merged.values(), key=lambda s: s.name)
+
+
+def clear_all() -> None:
+    with _caches_lock:
+        caches = list(_caches.values())
+    for c in caches:
+        c.clear()
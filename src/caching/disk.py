@@ -0,0 +1,219 @@
+"""Cache tier on the local disk, shared by all processes of a node
+
+Results are stored under the hash of the function and its arguments, one file per result. Files are written to a
+temporary name and renamed atomically, so readers see either nothing or a complete result. While a process computes
+a result it holds an exclusive `flock` on the key's lock file; other processes needing the same result wait for it
+and read the file instead of computing the result again.
+
+Values are pickled with protocol 5 and out-of-band buffers: the buffers of numpy arrays and pandas objects are
+stored page aligned after the pickle, and are memory mapped (copy-on-write) when read. Loading a large dataframe
+therefore doesn't copy it, and the pages are shared with every other process having it mapped.
+"""
+import contextlib
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # not on Windows, results are still shared, but may be computed by several processes at once
+    fcntl = None
+
+CACHE_DIR = Path(os.environ.get("FUNCTION_CACHE_DIR", "data/interim/function_cache"))
+CACHE_MAX_BYTES = int(os.environ.get("FUNCTION_CACHE_MAX_BYTES", 4 * 1024 ** 3))
+
+_MAGIC = b"SCACHE1\n"
+_HEADER = struct.Struct("<8sdQQ")  # magic, created_at, pickle length, number of buffers
+_ALIGNMENT = mmap.PAGESIZE
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+@dataclass
+class DiskEntry:
+    value: Any
+    created_at: float  # time.time() when the result was stored
+
+
+class DiskStore:
+    def __init__(self, directory: Union[str, Path] = CACHE_DIR, max_bytes: Optional[int] = CACHE_MAX_BYTES):
+        """
+        Directory of pickled results, addressed by their key
+        :param directory: folder for results and lock files
+        :param max_bytes: budget for the size of all results, the least recently used are removed to stay below it
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._budget_lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory/key[:2]/f"{key}.bin"
+
+    @contextlib.contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        """
+        Hold the exclusive lock of a key, across threads and processes.
+        The lock file is removed again when the lock is released, so only keys currently being computed have one.
+        """
+        path = self.directory/"locks"/f"{key}.lock"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            f = open(path, "a")
+            if fcntl is None:
+                break
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            # the previous holder may have removed the file while we waited, its lock doesn't exclude anyone anymore
+            try:
+                if os.path.samestat(os.fstat(f.fileno()), os.stat(path)):
+                    break
+            except FileNotFoundError:
+                pass
+            f.close()
+        try:
+            yield
+        finally:
+            with f:
+                try:
+                    os.remove(path)  # while still holding the lock, waiters notice and lock the next file
+                except OSError:
+                    pass
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[DiskEntry]:
+        """
+        Load a result, memory mapping its buffers
+        :param key: key of the result
+        :param max_age: seconds after which a result is considered expired and not returned
+        :return: the result or `None` if there is no (valid) result
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (FileNotFoundError, ValueError):  # ValueError: empty file
+            return None
+
+        try:
+            magic, created_at, pickle_len, n_buffers = _HEADER.unpack_from(mapped, 0)
+        except struct.error:
+            return None
+        if magic != _MAGIC or (max_age is not None and time.time() - created_at > max_age):
+            return None
+
+        lengths = struct.unpack_from(f"<{n_buffers}Q", mapped, _HEADER.size)
+        view = memoryview(mapped)
+        offset = _aligned(_HEADER.size + 8 * n_buffers)
+        data = view[offset:offset + pickle_len]
+        offset = _aligned(offset + pickle_len)
+        buffers = []
+        for length in lengths:
+            buffers.append(view[offset:offset + length])
+            offset = _aligned(offset + length)
+        try:
+            value = pickle.loads(data, buffers=buffers)
+        except Exception:  # damaged file, or written by an incompatible version of a class
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return DiskEntry(value, created_at)
+
+    def put(self, key: str, value: Any) -> bool:
+        """
+        Store a result
+        :return: False if the value can't be pickled
+        """
+        buffers: List[pickle.PickleBuffer] = []
+        try:
+            data = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+        except Exception:
+            return False
+        raw_buffers = [b.raw() for b in buffers]
+
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, time.time(), len(data), len(raw_buffers)))
+                f.write(struct.pack(f"<{len(raw_buffers)}Q", *(b.nbytes for b in raw_buffers)))
+                for chunk in [data] + raw_buffers:
+                    f.seek(_aligned(f.tell()))
+                    f.write(chunk)
+            os.replace(tmp_path, path)  # readers never see a half written file
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._enforce_budget()
+        return True
+
+    def _entries(self) -> List[os.DirEntry]:
+        entries = []
+        if not self.directory.is_dir():
+            return entries
+        for sub in os.scandir(self.directory):
+            if sub.is_dir() and sub.name != "locks":
+                entries += [e for e in os.scandir(sub.path) if e.name.endswith(".bin")]
+        return entries
+
+    def _enforce_budget(self) -> None:
+        if self.max_bytes is None:
+            return
+        with self._budget_lock:
+            files = []
+            for e in self._entries():
+                try:
+                    st = e.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_mtime, st.st_size, e.path))
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)  # processes having it mapped keep their copy
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def size(self) -> int:
+        total = 0
+        for e in self._entries():
+            try:
+                total += e.stat().st_size
+            except FileNotFoundError:
+                pass
+        return total
+
+    def clear(self) -> None:
+        for e in self._entries():
+            try:
+                os.remove(e.path)
+            except FileNotFoundError:
+                pass
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_disk_store(directory: Union[str, Path, None] = None) -> DiskStore:
+    """Shared store of a directory, by default `CACHE_DIR`"""
+    directory = Path(directory) if directory is not None else CACHE_DIR
+    with _stores_lock:
+        store = _stores.get(directory)
+        if store is None:
+            store = _stores[directory] = DiskStore(directory)
+        return store
@@ -0,0 +1,83 @@
+"""Read-only views of cached results, for `cache(frozen=True)`
+
+Instead of hashing a result again on every hit to detect mutations, a frozen result can't be mutated in the first
+place: the buffers of numpy arrays and of the columns of dataframes are marked read-only
+(`flags.writeable = False`), so writing to them raises a `ValueError`, and containers are replaced by immutable
+equivalents: lists by tuples, dicts by `MappingProxyType`, sets by frozensets.
+No data is copied; hits get a new dataframe object on the same buffers, so columns can't be added to the cached
+one either. Other objects are returned as they are, mutating them still changes the cached result.
+"""
+import types
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# buffers behind numpy backed extension arrays: categoricals, nullable integers and booleans, datetimes with timezone
+_EXTENSION_BUFFERS = ("_codes", "_data", "_mask", "_ndarray")
+
+
+def _freeze_array(arr: np.ndarray) -> np.ndarray:
+    arr.flags.writeable = False
+    return arr
+
+
+def _freeze_values(values: Any) -> None:
+    if isinstance(values, np.ndarray):
+        _freeze_array(values)
+        return
+    for name in _EXTENSION_BUFFERS:
+        buffer = getattr(values, name, None)
+        if isinstance(buffer, np.ndarray):
+            _freeze_array(buffer)
+
+
+def _freeze_pandas(obj: pd.core.generic.NDFrame) -> pd.core.generic.NDFrame:
+    manager = getattr(obj, "_mgr", None)
+    if manager is None:  # pandas < 1.1
+        manager = obj._data
+    for block in manager.blocks:
+        _freeze_values(block.values)
+    return obj
+
+
+def freeze(value: Any, _memo: Optional[Dict[int, Any]] = None) -> Any:
+    """
+    Make a result read-only, without copying its buffers
+    :param value: result of a cached function
+    :return: `value`, with read-only buffers if it's an array, dataframe or series, or an immutable copy of it if it's
+        a list, tuple, dict or set, with all items frozen as well
+    """
+    if _memo is None:
+        _memo = {}
+    if id(value) in _memo:  # shared or cyclic reference
+        return _memo[id(value)]
+
+    if isinstance(value, np.ndarray):
+        frozen = _freeze_array(value)
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        frozen = _freeze_pandas(value)
+    elif isinstance(value, (list, tuple)):
+        _memo[id(value)] = value
+        frozen = tuple(freeze(item, _memo) for item in value)
+        if type(value) is not list and type(value) is not tuple:  # namedtuples
+            frozen = type(value)(*frozen)
+    elif isinstance(value, dict):
+        _memo[id(value)] = value
+        frozen = types.MappingProxyType({k: freeze(v, _memo) for k, v in value.items()})
+    elif isinstance(value, (set, frozenset)):
+        frozen = frozenset(value)
+    else:
+        frozen = value
+    _memo[id(value)] = frozen
+    return frozen
+
+
+def frozen_view(value: Any) -> Any:
+    """
+    Object to return for a frozen result: dataframes and series are returned as a new object on the same read-only
+    buffers, so adding, removing or renaming columns doesn't change the cached result; anything else as it is
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    return value
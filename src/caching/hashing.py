@@ -0,0 +1,308 @@
+"""Hashing of the arguments and return values of cached functions
+
+Besides the recursive `Hasher`, this module provides hash functions for dataframes and arrays which digest their
+buffers directly instead of pickling them. `FAST_HASH_FUNCS` are used by `src.caching.cache` by default. They hash
+every row, so they are slower than the hasher of `st.cache` on large inputs, which only hashes a sample of them; don't
+pass them to `st.cache(hash_funcs=...)`. `sampled_hash_funcs` only hashes a sample of huge inputs; it is much
+faster, but misses changes outside of the sample, so it's only suitable for data which is replaced, not edited.
+"""
+import hashlib
+import inspect
+import pickle
+import types
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# custom hash functions by type or by fully qualified type name, like the `hash_funcs` of `st.cache`
+HashFuncs = Dict[Union[type, str], Callable[[Any], Any]]
+
+# inputs larger than SAMPLE_THRESHOLD_BYTES are hashed by SAMPLE_BLOCKS blocks of rows,
+# with a total of SAMPLE_BYTES, if `sampled_hash_funcs` are used
+SAMPLE_THRESHOLD_BYTES = 64 * 1024 ** 2
+SAMPLE_BYTES = 4 * 1024 ** 2
+SAMPLE_BLOCKS = 256
+
+_PRIMITIVE_TYPES = (type(None), bool, int, float, complex, str)
+
+
+class UnhashableTypeError(TypeError):
+    pass
+
+
+def _type_name(t: type) -> str:
+    return f"{t.__module__}.{t.__qualname__}"
+
+
+def _find_hash_func(value_type: type, hash_funcs: HashFuncs) -> Optional[Callable[[Any], Any]]:
+    for t in value_type.__mro__:
+        fn = hash_funcs.get(t)
+        if fn is None:
+            fn = hash_funcs.get(_type_name(t))
+        if fn is not None:
+            return fn
+    return None
+
+
+# function keys by function: looking up the source takes milliseconds, and is repeated for every function
+# a cached function depends on, on every call. Functions redefined on every rerun drop out with their old definition.
+_function_keys: "weakref.WeakKeyDictionary[Callable, str]" = weakref.WeakKeyDictionary()
+
+
+def function_key(func: Callable) -> str:
+    """Identity of a function: its name and its source, so changing the function's body invalidates its cache"""
+    code = getattr(func, "__code__", None)
+    key = _function_keys.get(func) if code is not None else None
+    if key is not None:
+        return key
+    try:
+        source = inspect.getsource(func).encode("utf-8")
+    except (OSError, TypeError):
+        source = code.co_code if code is not None else repr(func).encode("utf-8")
+    digest = hashlib.sha1(source).hexdigest()
+    key = f"{func.__module__}.{func.__qualname__}:{digest}"
+    if code is not None:
+        _function_keys[func] = key
+    return key
+
+
+def referenced_globals(code: types.CodeType) -> Tuple[str, ...]:
+    """Names a function's code (including nested functions and comprehensions) may read from its globals"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names.update(referenced_globals(const))
+    return tuple(sorted(names))
+
+
+def function_dependencies(func: Callable, global_names: Tuple[str, ...]) -> List[Tuple[str, Any]]:
+    """
+    Values a function depends on besides its arguments: the contents of its closure and the globals it reads
+    Modules, classes and callables other than plain functions are left out, like `st.cache` they are part of the code,
+    not of the data a result depends on.
+    :param func: the function
+    :param global_names: result of `referenced_globals` for the function's code
+    :return: (name, value) pairs
+    """
+    values = []
+    code = getattr(func, "__code__", None)
+    if code is None:
+        return values
+    for name, cell in zip(code.co_freevars, func.__closure__ or ()):
+        try:
+            values.append((name, cell.cell_contents))
+        except ValueError:  # cell of a variable which isn't assigned yet
+            pass
+    module_globals = func.__globals__
+    values += [(name, module_globals[name]) for name in global_names if name in module_globals]
+    return [(name, value) for name, value in values
+            if isinstance(value, types.FunctionType) or not (callable(value) or isinstance(value, types.ModuleType))]
+
+
+def _update_array(h, arr: np.ndarray) -> None:
+    if arr.dtype == object:
+        if pd.api.types.infer_dtype(arr.ravel(), skipna=False) not in ("string", "empty"):
+            # hash_array hashes other objects by their str(), so 1 and "1" or None and "None" would collide
+            _update_pickled(h, arr)
+            return
+        arr = pd.util.hash_array(arr.ravel())  # vectorized hashing of the strings, each distinct one only once
+    arr = np.ascontiguousarray(arr)  # no copy if already contiguous
+    h.update(arr.reshape(-1).view(np.uint8))
+
+
+def _update_pickled(h, obj: Any) -> None:
+    # protocol 5 hands out large buffers separately, they are hashed in place instead of being copied into the pickle
+    buffers = []
+    h.update(pickle.dumps(obj, protocol=5, buffer_callback=buffers.append))
+    for buffer in buffers:
+        h.update(buffer.raw())
+
+
+def _values(obj: Union[pd.Series, pd.Index]) -> Union[np.ndarray, Any]:
+    """Numpy array or extension array behind a series or index, without copying it"""
+    return obj.to_numpy() if isinstance(obj.dtype, np.dtype) else obj.array
+
+
+def _update_values(h, values: Any, row_slices: Optional[List[slice]] = None) -> None:
+    if isinstance(values, pd.Categorical):
+        _update_values(h, _values(values.categories))
+        values = values.codes
+    for rows in row_slices or [slice(None)]:
+        if isinstance(values, np.ndarray):
+            _update_array(h, values[rows])  # the column's buffer, without copying it
+        else:  # extension types, e.g. arrow backed strings
+            _update_pickled(h, values[rows])
+
+
+def _update_index(h, index: pd.Index, row_slices: Optional[List[slice]] = None) -> None:
+    if isinstance(index, pd.RangeIndex):
+        h.update(repr((index.start, index.stop, index.step)).encode("utf-8"))
+    elif isinstance(index, pd.MultiIndex):
+        _update_array(h, pd.util.hash_pandas_object(index, categorize=False).to_numpy())
+    else:
+        _update_values(h, _values(index), row_slices)
+
+
+def _update_pandas(h, obj: Union[pd.DataFrame, pd.Series, pd.Index], row_slices: Optional[List[slice]] = None) -> None:
+    if isinstance(obj, pd.Index):
+        h.update(repr((type(obj).__name__, obj.shape, str(obj.dtype))).encode("utf-8"))
+        _update_index(h, obj, row_slices)
+        return
+    if isinstance(obj, pd.DataFrame):
+        h.update(repr((obj.shape, list(obj.columns), [str(t) for t in obj.dtypes])).encode("utf-8"))
+        for _, column in obj.items():
+            _update_values(h, _values(column), row_slices)
+    else:
+        h.update(repr((obj.shape, obj.name, str(obj.dtype))).encode("utf-8"))
+        _update_values(h, _values(obj), row_slices)
+    _update_index(h, obj.index, row_slices)
+
+
+def hash_ndarray(arr: np.ndarray) -> bytes:
+    """Digest of dtype, shape and data buffer of an array"""
+    h = hashlib.sha1(f"{arr.dtype.str}{arr.shape}".encode("utf-8"))
+    try:
+        _update_array(h, arr)
+    except (TypeError, ValueError):  # objects pandas can't hash, e.g. lists
+        h = hashlib.sha1(b"pickled")
+        _update_pickled(h, arr)
+    return h.digest()
+
+
+def hash_pandas(obj: Union[pd.DataFrame, pd.Series, pd.Index]) -> bytes:
+    """Digest of shape, columns, dtypes, index and the buffers of all columns of a dataframe, series or index"""
+    h = hashlib.sha1()
+    try:
+        _update_pandas(h, obj)
+    except (TypeError, ValueError):  # cells pandas can't hash, e.g. lists
+        h = hashlib.sha1(b"pickled")
+        _update_pickled(h, obj)
+    return h.digest()
+
+
+def _sample_slices(n: int, row_bytes: int, sample_bytes: int, blocks: int) -> List[slice]:
+    block_len = max(1, sample_bytes // (max(1, row_bytes) * blocks))
+    starts = np.linspace(0, max(0, n - block_len), blocks).astype(np.int64)
+    return [slice(start, start + block_len) for start in np.unique(starts)]
+
+
+def hash_ndarray_sampled(arr: np.ndarray, threshold_bytes: int = SAMPLE_THRESHOLD_BYTES,
+                         sample_bytes: int = SAMPLE_BYTES, blocks: int = SAMPLE_BLOCKS) -> bytes:
+    """
+    Like `hash_ndarray`, but of arrays larger than `threshold_bytes` only `blocks` evenly spaced blocks of rows,
+    of about `sample_bytes` in total, are hashed
+    """
+    if arr.nbytes <= threshold_bytes or arr.ndim == 0:
+        return hash_ndarray(arr)
+    h = hashlib.sha1(f"sampled{arr.dtype.str}{arr.shape}".encode("utf-8"))
+    for rows in _sample_slices(len(arr), arr.nbytes // len(arr), sample_bytes, blocks):
+        _update_array(h, arr[rows])
+    return h.digest()
+
+
+def hash_pandas_sampled(obj: Union[pd.DataFrame, pd.Series], threshold_bytes: int = SAMPLE_THRESHOLD_BYTES,
+                        sample_bytes: int = SAMPLE_BYTES, blocks: int = SAMPLE_BLOCKS) -> bytes:
+    """
+    Like `hash_pandas`, but of objects whose buffers are larger than `threshold_bytes` only `blocks` evenly spaced
+    blocks of rows, of about `sample_bytes` in total, are hashed
+    """
+    nbytes = obj.memory_usage(index=True, deep=False)
+    nbytes = int(nbytes.sum()) if isinstance(obj, pd.DataFrame) else int(nbytes)
+    if nbytes <= threshold_bytes or len(obj) == 0:
+        return hash_pandas(obj)
+    h = hashlib.sha1(b"sampled")
+    try:
+        _update_pandas(h, obj, _sample_slices(len(obj), nbytes // len(obj), sample_bytes, blocks))
+    except (TypeError, ValueError):
+        return hash_pandas(obj)
+    return h.digest()
+
+
+FAST_HASH_FUNCS: HashFuncs = {
+    np.ndarray: hash_ndarray,
+    pd.DataFrame: hash_pandas,
+    pd.Series: hash_pandas,
+    pd.Index: hash_pandas,
+}
+
+
+def sampled_hash_funcs(threshold_bytes: int = SAMPLE_THRESHOLD_BYTES, sample_bytes: int = SAMPLE_BYTES,
+                       blocks: int = SAMPLE_BLOCKS) -> HashFuncs:
+    """
+    Hash functions only hashing a sample of the rows of arrays and dataframes larger than `threshold_bytes`
+    Changes outside of the sample go unnoticed, only use them for data which is replaced as a whole.
+    """
+    return {
+        np.ndarray: lambda arr: hash_ndarray_sampled(arr, threshold_bytes, sample_bytes, blocks),
+        pd.DataFrame: lambda df: hash_pandas_sampled(df, threshold_bytes, sample_bytes, blocks),
+        pd.Series: lambda s: hash_pandas_sampled(s, threshold_bytes, sample_bytes, blocks),
+        pd.Index: hash_pandas,
+    }
+
+
+class Hasher:
+    def __init__(self, hash_funcs: Optional[HashFuncs] = None):
+        """
+        Recursive content hasher
+        :param hash_funcs: custom hash functions, their result is hashed instead of the value itself;
+            they take precedence over `FAST_HASH_FUNCS`
+        """
+        self.hash_funcs = {**FAST_HASH_FUNCS, **(hash_funcs or {})}
+        self._resolved: Dict[type, Optional[Callable[[Any], Any]]] = {}  # hash function per type, found via the MRO
+
+    def digest(self, value: Any) -> bytes:
+        h = hashlib.sha1()
+        self._update(h, value, set())
+        return h.digest()
+
+    def _update(self, h, value: Any, stack: set) -> None:
+        value_type = type(value)
+        try:
+            fn = self._resolved[value_type]
+        except KeyError:
+            fn = self._resolved[value_type] = _find_hash_func(value_type, self.hash_funcs)
+        if fn is not None:
+            result = fn(value)
+            h.update(b"custom:")
+            if result is not value:
+                self._update(h, result, stack)
+            return
+
+        h.update(_type_name(type(value)).encode("utf-8"))
+        if isinstance(value, _PRIMITIVE_TYPES):
+            h.update(repr(value).encode("utf-8"))
+            return
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            h.update(value)
+            return
+
+        if id(value) in stack:  # reference cycle
+            h.update(b"cycle")
+            return
+        stack.add(id(value))
+        try:
+            if isinstance(value, (list, tuple)):
+                h.update(str(len(value)).encode())
+                for item in value:
+                    self._update(h, item, stack)
+            elif isinstance(value, dict):
+                h.update(str(len(value)).encode())
+                for k, v in value.items():
+                    self._update(h, k, stack)
+                    self._update(h, v, stack)
+            elif isinstance(value, (set, frozenset)):
+                for item_digest in sorted(Hasher(self.hash_funcs).digest(item) for item in value):
+                    h.update(item_digest)
+            elif isinstance(value, (types.FunctionType, types.MethodType)):
+                h.update(function_key(value).encode("utf-8"))
+            else:
+                try:
+                    h.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+                except Exception as e:
+                    raise UnhashableTypeError(
+                        f"Cannot hash object of type {_type_name(type(value))}, pass a function for it in "
+                        f"`hash_funcs`") from e
+        finally:
+            stack.discard(id(value))
@@ -0,0 +1,101 @@
+"""Reduce the data of charts before it is embedded into the chart's specification
+
+Altair embeds every row of the charted dataframe as JSON into the spec sent to the browser. A line chart can't show
+more points than it has pixels anyway, so long lines are downsampled with Largest-Triangle-Three-Buckets
+(LTTB, Steinarsson 2013), which keeps the peaks and the overall shape of the line. Short lines are kept as they are,
+so charts of many short lines look exactly the same.
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# points per chart, a few per horizontal pixel of a typical chart
+MAX_CHART_POINTS = 2000
+# lines with at most this many points are never downsampled, whatever their share of MAX_CHART_POINTS
+MIN_LINE_POINTS = 100
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling of a line
+    :param x: sorted x values
+    :param y: y values
+    :param n_out: number of points to keep, at least 3
+    :return: sorted indices of the kept points, always including the first and the last one
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # the first and last point are kept as they are, the points in between are split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    edges = np.append(edges, n)  # the "next bucket" of the last bucket is the last point
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0  # point selected in the previous bucket
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_x = x[end:edges[i + 2]].mean()
+        next_y = y[end:edges[i + 2]].mean()
+        # twice the area of the triangles (previous point, candidate, average of next bucket)
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def _numeric(values: pd.Series) -> np.ndarray:
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=np.float64)
+    return pd.to_datetime(values).to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(np.float64)
+
+
+def downsample_lines(df: pd.DataFrame, x_col: str, y_col: str, cat_col: Optional[str] = None,
+                     max_points: int = MAX_CHART_POINTS, min_line_points: int = MIN_LINE_POINTS) -> pd.DataFrame:
+    """
+    Data of a line chart (one line per category), reduced to what the chart displays
+    Only the charted columns are kept. If there are more than `max_points` rows, lines longer than `min_line_points`
+    are downsampled with LTTB, sharing what's left of `max_points` after the shorter lines in proportion to their
+    number of points. Values sharing the same x and category are only averaged if `df` has no other columns, which
+    could tell them apart (e.g. one value per sex and year in the line of a job).
+    :param df: data of the chart
+    :param x_col: column of the x axis (numbers, dates or date strings)
+    :param y_col: numeric column of the y axis
+    :param cat_col: column distinguishing the lines, if any
+    :param max_points: total number of points to keep, exceeded if the short lines alone have more
+    :param min_line_points: lines with at most this many points are kept completely
+    :return: reduced data, with the columns `x_col`, `y_col` and `cat_col`
+    """
+    cols = [c for c in (x_col, y_col, cat_col) if c is not None]
+    data = df[cols]
+    if len(data) <= max_points:
+        return data
+
+    keys = [c for c in (cat_col, x_col) if c is not None]
+    data = data.dropna(subset=[y_col])
+    if len(df.columns) == len(cols):  # duplicates of x within a line are true duplicates
+        data = data.groupby(keys, sort=False, observed=True)[y_col].mean().reset_index()
+    data = data.assign(_x=_numeric(data[x_col])).sort_values(keys[:-1] + ["_x"], kind="stable")
+
+    groups = data.groupby(cat_col, sort=False, observed=True).indices if cat_col is not None \
+        else {None: np.arange(len(data))}
+    short = [positions for positions in groups.values() if len(positions) <= min_line_points]
+    long = [positions for positions in groups.values() if len(positions) > min_line_points]
+    budget = max_points - sum(len(positions) for positions in short)
+    long_points = sum(len(positions) for positions in long)
+
+    x, y = data["_x"].to_numpy(), data[y_col].to_numpy(dtype=np.float64)
+    keep = short
+    for positions in long:
+        n_out = max(min_line_points, round(budget * len(positions) / long_points))
+        keep.append(positions[lttb(x[positions], y[positions], n_out)])
+    return data.iloc[np.sort(np.concatenate(keep))][cols].reset_index(drop=True)
+
+
+def payload_bytes(df: pd.DataFrame) -> int:
+    """Size of `df` embedded into a chart's spec as JSON records"""
+    return len(df.to_json(orient="records", date_format="iso").encode("utf-8"))
@@ -0,0 +1,263 @@
+"""Render time instrumentation of page sections
+
+Every measured render records wall time, CPU time of the rendering thread and the number of emitted elements per
+(page, section). The latest samples are kept as rolling window for percentiles (p50/p95/p99), and all renders are
+counted in cumulative histogram buckets. Both can be exported in the Prometheus text format (to a file or via a
+small HTTP endpoint) and as CSV.
+
+Exports are configured with environment variables:
+ - `SECTION_METRICS_PROM_FILE`: file the Prometheus metrics are written to
+ - `SECTION_METRICS_CSV_FILE`: file the per-section summary is written to
+ - `SECTION_METRICS_PORT`: port of an HTTP endpoint serving the Prometheus metrics at `/metrics`
+"""
+import collections
+import csv
+import io
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, List, Optional, Tuple
+
+# upper bounds (in seconds) of the histogram buckets of the render time
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+# number of latest renders per section used for percentiles
+WINDOW_SIZE = 1000
+# minimum seconds between two exports to file
+EXPORT_INTERVAL = 10.0
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+_local = threading.local()
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return math.nan
+    idx = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def _install_element_counter() -> bool:
+    """Count elements emitted by streamlit in the thread-local counter of the active measurement"""
+    try:
+        from streamlit.DeltaGenerator import DeltaGenerator
+    except ImportError:
+        return False
+    # the name of the method every element passes through differs between streamlit versions
+    name = next((n for n in ("_enqueue_new_element_delta", "_enqueue") if hasattr(DeltaGenerator, n)), None)
+    if name is None:
+        return False
+    enqueue = getattr(DeltaGenerator, name)
+    if getattr(enqueue, "_counts_elements", False):
+        return True
+
+    def counting_enqueue(self, *args, **kwargs):
+        counter = getattr(_local, "elements", None)
+        if counter is not None:
+            _local.elements = counter + 1
+        return enqueue(self, *args, **kwargs)
+
+    counting_enqueue._counts_elements = True
+    setattr(DeltaGenerator, name, counting_enqueue)
+    return True
+
+
+@dataclass
+class SectionStats:
+    page: str
+    section: str
+    count: int = 0
+    wall_sum: float = 0.0
+    cpu_sum: float = 0.0
+    elements_sum: int = 0
+    bucket_counts: List[int] = field(default_factory=lambda: [0] * len(BUCKETS))
+    wall: Deque[float] = field(default_factory=lambda: collections.deque(maxlen=WINDOW_SIZE))
+    cpu: Deque[float] = field(default_factory=lambda: collections.deque(maxlen=WINDOW_SIZE))
+    elements: Deque[int] = field(default_factory=lambda: collections.deque(maxlen=WINDOW_SIZE))
+
+    def add(self, wall: float, cpu: float, elements: Optional[int]) -> None:
+        self.count += 1
+        self.wall_sum += wall
+        self.cpu_sum += cpu
+        self.wall.append(wall)
+        self.cpu.append(cpu)
+        if elements is not None:
+            self.elements_sum += elements
+            self.elements.append(elements)
+        for i, upper in enumerate(BUCKETS):
+            if wall <= upper:
+                self.bucket_counts[i] += 1
+                break
+
+    def percentiles(self) -> Dict[str, float]:
+        wall = sorted(self.wall)
+        cpu = sorted(self.cpu)
+        result = {}
+        for q in QUANTILES:
+            name = f"p{round(q * 100)}"
+            result[f"wall_{name}"] = _percentile(wall, q)
+            result[f"cpu_{name}"] = _percentile(cpu, q)
+        return result
+
+
+class RenderMetrics:
+    def __init__(self):
+        self._stats: Dict[Tuple[str, str], SectionStats] = {}
+        self._lock = threading.Lock()
+        self.counts_elements = _install_element_counter()
+        self._last_export = 0.0
+
+    @contextmanager
+    def measure(self, page: str, section: str):
+        """Measure the rendering of a section within the `with` block. Interrupted renders aren't recorded."""
+        outer_elements = getattr(_local, "elements", None)
+        _local.elements = 0
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            yield
+        except BaseException:
+            _local.elements = outer_elements
+            raise
+        wall = time.perf_counter() - start_wall
+        cpu = time.thread_time() - start_cpu
+        elements = _local.elements if self.counts_elements else None
+        _local.elements = outer_elements if outer_elements is None else outer_elements + _local.elements
+        self.record(page, section, wall, cpu, elements)
+
+    def record(self, page: str, section: str, wall: float, cpu: float, elements: Optional[int] = None) -> None:
+        with self._lock:
+            stats = self._stats.get((page, section))
+            if stats is None:
+                stats = self._stats[(page, section)] = SectionStats(page, section)
+            stats.add(wall, cpu, elements)
+
+    def snapshot(self) -> List[Dict]:
+        """Summary per section: number of renders, average elements and percentiles of wall and CPU time"""
+        with self._lock:
+            rows = []
+            for stats in self._stats.values():
+                row = {"page": stats.page, "section": stats.section, "count": stats.count,
+                       "wall_avg": stats.wall_sum / stats.count, "cpu_avg": stats.cpu_sum / stats.count,
+                       "elements_avg": (sum(stats.elements) / len(stats.elements)) if stats.elements else math.nan}
+                row.update(stats.percentiles())
+                rows.append(row)
+            return rows
+
+    def to_prometheus(self) -> str:
+        def labels(stats: SectionStats, **extra) -> str:
+            values = {"page": stats.page, "section": stats.section, **extra}
+            escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values.values())
+            return "{" + ",".join(f'{k}="{v}"' for k, v in zip(values, escaped)) + "}"
+
+        lines = []
+        with self._lock:
+            all_stats = list(self._stats.values())
+
+            lines += ["# HELP streamlit_section_render_seconds Wall time of rendering a page section",
+                      "# TYPE streamlit_section_render_seconds histogram"]
+            for stats in all_stats:
+                cumulative = 0
+                for upper, count in zip(BUCKETS, stats.bucket_counts):
+                    cumulative += count
+                    le = "+Inf" if math.isinf(upper) else repr(upper)
+                    lines.append(f"streamlit_section_render_seconds_bucket{labels(stats, le=le)} {cumulative}")
+                lines.append(f"streamlit_section_render_seconds_sum{labels(stats)} {stats.wall_sum}")
+                lines.append(f"streamlit_section_render_seconds_count{labels(stats)} {stats.count}")
+
+            for metric, help_text, attr, sum_attr in [
+                ("streamlit_section_render_recent_seconds", "Wall time of the latest renders", "wall", "wall_sum"),
+                ("streamlit_section_cpu_seconds", "CPU time of the latest renders", "cpu", "cpu_sum"),
+                ("streamlit_section_elements", "Elements emitted by the latest renders", "elements", "elements_sum"),
+            ]:
+                if attr == "elements" and not self.counts_elements:
+                    continue
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} summary"]
+                for stats in all_stats:
+                    values = sorted(getattr(stats, attr))
+                    for q in QUANTILES:
+                        lines.append(f"{metric}{labels(stats, quantile=q)} {_percentile(values, q)}")
+                    lines.append(f"{metric}_sum{labels(stats)} {getattr(stats, sum_attr)}")
+                    lines.append(f"{metric}_count{labels(stats)} {stats.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_csv(self) -> str:
+        rows = self.snapshot()
+        out = io.StringIO()
+        if rows:
+            writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        return out.getvalue()
+
+    @staticmethod
+    def _write_atomic(path: str, content: str) -> None:
+        # scrapers must never read a half written file
+        folder = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=folder)
+        with os.fdopen(fd, "w", newline="") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def write_prometheus(self, path: str) -> None:
+        self._write_atomic(path, self.to_prometheus())
+
+    def write_csv(self, path: str) -> None:
+        self._write_atomic(path, self.to_csv())
+
+    def export_if_due(self) -> None:
+        """Write the files configured via environment variables, at most every `EXPORT_INTERVAL` seconds"""
+        now = time.monotonic()
+        if now - self._last_export < EXPORT_INTERVAL:
+            return
+        self._last_export = now
+        prom_file = os.environ.get("SECTION_METRICS_PROM_FILE")
+        csv_file = os.environ.get("SECTION_METRICS_CSV_FILE")
+        if prom_file:
+            self.write_prometheus(prom_file)
+        if csv_file:
+            self.write_csv(csv_file)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve the Prometheus metrics at `http://host:port/metrics` from a daemon thread"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="SectionMetrics", daemon=True).start()
+        return server
+
+
+_metrics = RenderMetrics()
+_server_lock = threading.Lock()
+_server = None
+
+
+def get_render_metrics() -> RenderMetrics:
+    """Process wide metrics; also starts the HTTP endpoint if `SECTION_METRICS_PORT` is set"""
+    global _server
+    port = os.environ.get("SECTION_METRICS_PORT")
+    if port and _server is None:
+        with _server_lock:
+            if _server is None:
+                _server = _metrics.serve(int(port))
+    return _metrics
@@ -0,0 +1,137 @@
+"""In-process startup profiling
+
+Records the cost of every module import (like `python -X importtime`, but captured in-process and attributed to
+the phase of the startup which triggered it) and named points in time, e.g. when the first element was rendered.
+"""
+import importlib.abc
+import json
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    phase: str  # startup phase during which the module was imported
+    parent: Optional[str]  # module whose import triggered this one
+    self_ms: float = 0.0  # time spent executing the module itself
+    cumulative_ms: float = 0.0  # including all imports triggered by the module
+
+
+class _TimedLoader(importlib.abc.Loader):
+    def __init__(self, loader, profiler: "StartupProfiler"):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        spec = module.__spec__
+        # hide the wrapper again, the module should only ever see its real loader
+        spec.loader = self._loader
+        module.__loader__ = self._loader
+        with self._profiler._timed_import(spec.name):
+            self._loader.exec_module(module)
+
+
+class StartupProfiler(importlib.abc.MetaPathFinder):
+    """
+    Meta path finder wrapping the loaders of all modules imported while it is active.
+    Use as context manager, or call `start`/`stop`.
+    """
+
+    def __init__(self):
+        self.records: List[ImportRecord] = []
+        self.marks: Dict[str, float] = {}  # name -> ms since start
+        self.phases: Dict[str, float] = {}  # name -> duration in ms
+        self._phase = "startup"
+        self._stack: List[List] = []  # [module name, start, time spent in child imports]
+        self._start = None
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    @contextmanager
+    def _timed_import(self, name: str):
+        parent = self._stack[-1][0] if self._stack else None
+        frame = [name, time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            cumulative = time.perf_counter() - frame[1]
+            if self._stack:
+                self._stack[-1][2] += cumulative
+            self.records.append(ImportRecord(name, self._phase, parent,
+                                             (cumulative - frame[2]) * 1000, cumulative * 1000))
+
+    def start(self) -> "StartupProfiler":
+        self._start = time.perf_counter()
+        sys.meta_path.insert(0, self)
+        return self
+
+    def stop(self) -> None:
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Attribute all imports within the block to the phase `name` and record its duration"""
+        previous, self._phase = self._phase, name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = (time.perf_counter() - start) * 1000
+            self._phase = previous
+
+    def mark(self, name: str) -> None:
+        """Record the time since start under `name`, only the first call per name counts"""
+        if name not in self.marks:
+            self.marks[name] = (time.perf_counter() - self._start) * 1000
+
+    def format_table(self, limit: Optional[int] = 30) -> str:
+        """Imports sorted by cumulative time, followed by phases and marks"""
+        records = sorted(self.records, key=lambda r: r.cumulative_ms, reverse=True)[:limit]
+        width = max([len(r.module) for r in records] + [len("module")])
+        lines = [f"{'module':<{width}} | {'self [ms]':>9} | {'cumul. [ms]':>11} | phase",
+                 "-" * (width + 40)]
+        lines += [f"{r.module:<{width}} | {r.self_ms:>9.1f} | {r.cumulative_ms:>11.1f} | {r.phase}" for r in records]
+        lines += ["", "phases:"]
+        lines += [f"  {name}: {ms:.1f} ms" for name, ms in self.phases.items()]
+        lines += ["", "marks (since start):"]
+        lines += [f"  {name}: {ms:.1f} ms" for name, ms in self.marks.items()]
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        return {
+            "imports": [asdict(r) for r in sorted(self.records, key=lambda r: r.cumulative_ms, reverse=True)],
+            "phases_ms": self.phases,
+            "marks_ms": self.marks,
+        }
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
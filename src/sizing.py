@@ -0,0 +1,76 @@
+"""Approximate memory footprint of Python objects.
+
+`sys.getsizeof` only reports the shallow size of an object. For cached values
+and state we want to know what an object actually keeps alive, including the
+buffers behind pandas and numpy objects.
+"""
+import sys
+import types
+from typing import Any, Optional, Set
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is a requirement, but keep sizing usable without it
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:  # pragma: no cover
+    pd = None
+
+_ATOMIC_TYPES = (str, bytes, bytearray, memoryview, int, float, bool, complex, type(None))
+# objects shared by the whole process, which would be wrong to attribute to a single value
+_SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def deep_sizeof(obj: Any, _seen: Optional[Set[int]] = None) -> int:
+    """
+    Estimate the number of bytes kept alive by an object and everything it references.
+    Objects referenced multiple times are only counted once.
+    :param obj: object to measure
+    :return: approximate size in bytes
+    """
+    if _seen is None:
+        _seen = set()
+
+    obj_id = id(obj)
+    if obj_id in _seen:
+        return 0
+    _seen.add(obj_id)
+
+    if pd is not None and isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep=True, index=True)
+        return int(usage.sum()) if isinstance(obj, pd.DataFrame) else int(usage)
+    if pd is not None and isinstance(obj, pd.Index):
+        return int(obj.memory_usage(deep=True))
+    if np is not None and isinstance(obj, np.ndarray):
+        if obj.dtype == object:
+            return sys.getsizeof(obj) + sum(deep_sizeof(item, _seen) for item in obj.ravel())
+        # getsizeof includes the data buffer of arrays owning their data;
+        # views don't, but they keep their base alive
+        if obj.flags.owndata or obj.base is None:
+            return sys.getsizeof(obj)
+        return sys.getsizeof(obj) + deep_sizeof(obj.base, _seen)
+
+    if isinstance(obj, _SHARED_TYPES):
+        return 0
+
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, _ATOMIC_TYPES):
+        return size
+    # containers are copied in a single step before measuring their items, so other threads
+    # mutating them meanwhile don't break the iteration
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, _seen) + deep_sizeof(v, _seen) for k, v in list(obj.items()))
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, _seen) for item in list(obj))
+
+    if hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), _seen)
+    slots = getattr(type(obj), '__slots__', ())
+    if isinstance(slots, str):
+        slots = (slots,)
+    size += sum(deep_sizeof(getattr(obj, s), _seen) for s in slots if hasattr(obj, s))
+
+    return size
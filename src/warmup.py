@@ -0,0 +1,105 @@
+"""Fill caches before the first user arrives
+
+Pages can provide `get_warmups() -> Dict[str, Callable]` next to `get_sections()`. Every warm-up function calls the
+cached functions of its page with the arguments the sections use, without rendering anything.
+Warm-ups are independent of each other and run concurrently; sections (which render elements and therefore are only
+run in script mode) are run one after the other.
+With the streamlit server, the script - and with it the warm-up - only runs once the first browser connects, so there
+the warm-ups run in a background thread instead of delaying the first pages.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.assets import ASSETS, get_asset
+
+
+@dataclass
+class WarmupResult:
+    name: str
+    seconds: float
+    error: Optional[str] = None
+
+
+def warm_assets() -> None:
+    for name in ASSETS:
+        get_asset(name)
+
+
+def _timed(name: str, fn: Callable) -> WarmupResult:
+    start = time.perf_counter()
+    try:
+        fn()
+    except Exception as e:  # a failing warm-up only means a slower first request, it must not stop the app
+        return WarmupResult(name, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+    return WarmupResult(name, time.perf_counter() - start)
+
+
+def run_warmups(warmups: Dict[str, Callable], max_workers: Optional[int] = None) -> List[WarmupResult]:
+    """
+    Run all warm-up functions in a thread pool
+    :param warmups: warm-up functions by name
+    :param max_workers: size of the thread pool, by default one thread per warm-up (they mostly wait for I/O)
+    :return: duration (and error, if any) per warm-up
+    """
+    if not warmups:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers or len(warmups), thread_name_prefix="Warmup") as pool:
+        futures = [pool.submit(_timed, name, fn) for name, fn in warmups.items()]
+        return [f.result() for f in futures]
+
+
+def run_sections(sections: Dict[str, Callable]) -> List[WarmupResult]:
+    """Render every section once, serially, as streamlit elements mustn't be created from several threads at once"""
+    return [_timed(name, fn) for name, fn in sections.items()]
+
+
+def format_report(results: List[WarmupResult]) -> str:
+    width = max([len(r.name) for r in results] + [len("cache")])
+    lines = [f"{'cache':<{width}} | {'time [s]':>8} | error", "-" * (width + 20)]
+    lines += [f"{r.name:<{width}} | {r.seconds:>8.2f} | {r.error or ''}" for r in results]
+    return "\n".join(lines)
+
+
+# functions returning the warm-ups and the sections to run
+Collect = Callable[[], Tuple[Dict[str, Callable], Dict[str, Callable]]]
+
+_lock = threading.Lock()
+_started = False
+_finished = threading.Event()
+_results: Optional[List[WarmupResult]] = None
+
+
+def _warm_up(collect: Collect, max_workers: Optional[int]) -> None:
+    global _results
+    try:
+        warmups, sections = collect()
+        _results = run_warmups(warmups, max_workers) + run_sections(sections)
+        print(format_report(_results))
+    finally:
+        _finished.set()
+
+
+def warm_up_once(collect: Collect, max_workers: Optional[int] = None,
+                 background: bool = False) -> Optional[List[WarmupResult]]:
+    """
+    Run the warm-ups (and sections) only the first time it's called in the process
+    :param collect: returns the warm-ups and the sections to run; called by the warm-up itself, as collecting them
+        imports all pages
+    :param max_workers: size of the thread pool for the warm-ups, see `run_warmups`
+    :param background: start the warm-up in a daemon thread and return right away, so the current (and any
+        concurrent) run of the script isn't delayed; otherwise wait for it to finish - later calls too, e.g. by reruns
+    :return: the results, or `None` while a warm-up running in the background isn't finished
+    """
+    global _started
+    with _lock:
+        first, _started = not _started, True
+    if first and background:
+        threading.Thread(target=_warm_up, args=(collect, max_workers), name="Warmup", daemon=True).start()
+    elif first:
+        _warm_up(collect, max_workers)
+    elif not background:
+        _finished.wait()
+    return _results
@@ -0,0 +1,9 @@
+import pytest
+
+from src.caching import core
+
+
+@pytest.fixture(autouse=True)
+def fresh_function_caches(monkeypatch):
+    """Functions defined the same way in several tests would share a cache, and the clock of the first one"""
+    monkeypatch.setattr(core, "_caches", {})
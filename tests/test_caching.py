@@ -0,0 +1,234 @@
+import threading
+import time
+from typing import Callable, List
+
+import pytest
+
+from src.caching import cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Source:
+    """Records the calls of a cached function; hashed by identity, as its state changes with every call"""
+
+    def __init__(self):
+        self.calls: List[str] = []
+        self.release = threading.Event()  # refreshes wait until the test lets them finish
+        self.fail = False
+
+
+HASH_BY_ID = {Source: id}
+
+
+def _wait_until(condition: Callable[[], bool], timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            pytest.fail("timed out")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def source() -> Source:
+    return Source()
+
+
+def _loader(clock: FakeClock, source: Source):
+    @cache(ttl=5, stale_while_revalidate=10, clock=clock, hash_funcs=HASH_BY_ID, show_spinner=False)
+    def load(key: str) -> int:
+        if source.fail:
+            raise RuntimeError("source unavailable")
+        source.calls.append(key)
+        if len(source.calls) > 1:
+            assert source.release.wait(5)
+        return len(source.calls)
+
+    return load
+
+
+def test_fresh_result_is_a_hit(clock, source):
+    load = _loader(clock, source)
+    assert load("a") == 1
+    clock.now = 5
+    assert load("a") == 1
+    assert source.calls == ["a"]
+    assert load.stats().stale_hits == 0
+
+
+def test_stale_result_is_returned_while_refreshing(clock, source):
+    load = _loader(clock, source)
+    load("a")
+    clock.now = 6
+
+    assert load("a") == 1  # doesn't wait for the refresh
+    assert load("a") == 1
+    _wait_until(lambda: len(source.calls) == 2)
+    assert load.stats().stale_hits == 2
+    source.release.set()
+
+
+def test_refresh_runs_once_and_replaces_the_stale_result(clock, source):
+    load = _loader(clock, source)
+    load("a")
+    clock.now = 6
+    for _ in range(5):
+        load("a")
+    source.release.set()
+
+    _wait_until(lambda: load("a") == 2)
+    assert source.calls == ["a", "a"]
+    clock.now = 10  # the refreshed result is fresh again: its ttl starts at 6
+    assert load("a") == 2
+    assert len(source.calls) == 2
+
+
+def test_results_past_the_cutoff_are_recomputed_before_returning(clock, source):
+    source.release.set()
+    load = _loader(clock, source)
+    load("a")
+    clock.now = 15  # ttl + stale_while_revalidate
+    assert load("a") == 1
+    _wait_until(lambda: load("a") == 2)
+
+    clock.now = 15 + 15.1
+    assert load("a") == 3
+    assert load.stats().expirations == 1
+
+
+@pytest.mark.filterwarnings("ignore:Refreshing the result")
+def test_failed_refresh_keeps_the_stale_result_until_the_cutoff(clock, source):
+    load = _loader(clock, source)
+    load("a")
+    source.fail = True
+    clock.now = 6
+    assert load("a") == 1
+    _wait_until(lambda: load.stats().refresh_errors == 1)
+    assert load("a") == 1
+
+    clock.now = 16
+    with pytest.raises(RuntimeError):
+        load("a")
+
+
+def test_without_stale_while_revalidate_expired_results_are_recomputed(clock, source):
+    @cache(ttl=5, clock=clock, hash_funcs=HASH_BY_ID, show_spinner=False)
+    def load() -> int:
+        source.calls.append("")
+        return len(source.calls)
+
+    assert load() == 1
+    clock.now = 5.1
+    assert load() == 2
+
+
+def test_closure_variables_are_part_of_the_key():
+    def scaled(factor: int):
+        @cache(show_spinner=False)
+        def scale(x: int) -> int:
+            return x * factor
+
+        return scale
+
+    assert scaled(1)(2) == 2
+    assert scaled(10)(2) == 20
+    assert scaled(1)(2) == 2
+
+
+THRESHOLD = 1
+
+
+def test_globals_are_part_of_the_key(monkeypatch):
+    @cache(show_spinner=False)
+    def above(values: tuple) -> list:
+        return [v for v in values if v > THRESHOLD]
+
+    assert above((1, 2, 3)) == [2, 3]
+    monkeypatch.setitem(globals(), "THRESHOLD", 2)
+    assert above((1, 2, 3)) == [3]
+
+
+class Rerun(BaseException):
+    """Like streamlit's script control exceptions, which aren't `Exception`s"""
+
+
+def _call_concurrently(fn: Callable, n: int) -> list:
+    results = []
+    barrier = threading.Barrier(n)
+
+    def call():
+        barrier.wait()
+        try:
+            results.append(fn())
+        except BaseException as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    return results
+
+
+def test_concurrent_misses_compute_once(source):
+    @cache(hash_funcs=HASH_BY_ID, show_spinner=False)
+    def load(src: str) -> list:
+        source.calls.append(src)
+        time.sleep(0.2)
+        return [src]
+
+    results = _call_concurrently(lambda: load("cars.json"), 30)
+
+    assert source.calls == ["cars.json"]
+    assert len(results) == 30 and all(r is results[0] for r in results)
+    assert load.stats().coalesced == 29
+
+
+def test_errors_are_passed_to_all_waiters(source):
+    @cache(hash_funcs=HASH_BY_ID, show_spinner=False)
+    def load(src: str) -> list:
+        source.calls.append(src)
+        time.sleep(0.2)
+        raise ValueError("broken dataset")
+
+    results = _call_concurrently(lambda: load("cars.json"), 10)
+
+    assert source.calls == ["cars.json"]
+    assert len(results) == 10 and all(isinstance(r, ValueError) for r in results)
+
+
+def test_abandoned_computation_is_taken_over_by_one_waiter(source):
+    @cache(hash_funcs=HASH_BY_ID, show_spinner=False)
+    def load(src: str) -> str:
+        source.calls.append(src)
+        if len(source.calls) == 1:
+            assert source.release.wait(5)
+            raise Rerun()
+        return "result"
+
+    owner = threading.Thread(target=lambda: pytest.raises(Rerun, load, "a"))
+    owner.start()
+    _wait_until(lambda: len(source.calls) == 1)
+    waiters = []
+    threads = [threading.Thread(target=lambda: waiters.append(load("a"))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    _wait_until(lambda: load.stats().coalesced == 5)
+    source.release.set()
+    for t in threads + [owner]:
+        t.join(5)
+
+    assert waiters == ["result"] * 5
+    assert source.calls == ["a", "a"]
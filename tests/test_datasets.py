@@ -0,0 +1,128 @@
+import json
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import pytest
+
+from ui.components.datasets import DatasetCache
+
+
+class StandInServer:
+    """Local stand-in for the datasets host, answering conditional requests like GitHub does"""
+
+    def __init__(self):
+        self.files: Dict[str, dict] = {}
+        self.log: List[tuple] = []  # (path, status) of every request
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                file = stand_in.files.get(self.path)
+                if file is None:
+                    status = 404
+                elif (file["etag"] is not None and self.headers.get("If-None-Match") == file["etag"]) or \
+                        (file["etag"] is None and self.headers.get("If-Modified-Since") == file["last_modified"]):
+                    status = 304
+                else:
+                    status = 200
+                stand_in.log.append((self.path, status))
+                self.send_response(status)
+                if file is not None:
+                    if file["etag"] is not None:
+                        self.send_header("ETag", file["etag"])
+                    self.send_header("Last-Modified", file["last_modified"])
+                if status == 200:
+                    self.send_header("Content-Length", str(len(file["content"])))
+                    self.end_headers()
+                    self.wfile.write(file["content"])
+                else:
+                    self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}/"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def publish(self, name: str, records: list, etag: Optional[str], modified: float = 0) -> None:
+        self.files[f"/{name}"] = {"content": json.dumps(records).encode("utf-8"), "etag": etag,
+                                  "last_modified": formatdate(modified, usegmt=True)}
+
+    def statuses(self, name: str) -> List[int]:
+        return [status for path, status in self.log if path == f"/{name}"]
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def server():
+    server = StandInServer()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def datasets(tmp_path) -> DatasetCache:
+    return DatasetCache(tmp_path / "datasets", timeout=5)
+
+
+CARS = [{"name": "a", "hp": 90}, {"name": "b", "hp": 120}]
+
+
+def test_unchanged_dataset_is_revalidated_with_etag(server, datasets):
+    server.publish("cars.json", CARS, etag='"v1"')
+    url = server.base_url + "cars.json"
+
+    first = datasets.read_json(url)
+    second = DatasetCache(datasets.cache_dir).read_json(url)  # e.g. after a restart
+
+    assert server.statuses("cars.json") == [200, 304]
+    assert first.equals(second)
+    assert second["hp"].tolist() == [90, 120]
+
+
+def test_unchanged_dataset_is_revalidated_with_last_modified(server, datasets):
+    server.publish("cars.json", CARS, etag=None, modified=1_500_000_000)
+    url = server.base_url + "cars.json"
+
+    datasets.read_json(url)
+    datasets.read_json(url)
+
+    assert server.statuses("cars.json") == [200, 304]
+
+
+def test_changed_dataset_replaces_the_cached_copy(server, datasets):
+    server.publish("cars.json", CARS, etag='"v1"')
+    url = server.base_url + "cars.json"
+    datasets.read_json(url)
+
+    server.publish("cars.json", CARS + [{"name": "c", "hp": 150}], etag='"v2"')
+    df = datasets.read_json(url)
+
+    assert server.statuses("cars.json") == [200, 200]
+    assert df["hp"].tolist() == [90, 120, 150]
+    assert len(list(datasets.cache_dir.glob("*.raw"))) == 1  # the old version was removed
+
+
+def test_offline_falls_back_to_the_disk_copy(server, datasets):
+    server.publish("cars.json", CARS, etag='"v1"')
+    url = server.base_url + "cars.json"
+    datasets.read_json(url)
+    server.stop()
+
+    restarted = DatasetCache(datasets.cache_dir, timeout=1)
+    assert restarted.read_json(url)["hp"].tolist() == [90, 120]
+    assert restarted.read_json(url)["hp"].tolist() == [90, 120]  # without waiting for the server again
+
+
+def test_offline_without_disk_copy_raises(server, datasets):
+    url = server.base_url + "cars.json"
+    server.stop()
+
+    with pytest.raises(OSError):
+        datasets.read_json(url)
@@ -0,0 +1,37 @@
+import threading
+import time
+
+from src.caching.disk import DiskStore
+
+
+def test_lock_files_are_removed_on_release(tmp_path):
+    store = DiskStore(tmp_path, max_bytes=None)
+    for i in range(5):
+        with store.lock(f"key{i}"):
+            assert (tmp_path / "locks" / f"key{i}.lock").exists()
+
+    assert list((tmp_path / "locks").iterdir()) == []
+
+
+def test_lock_stays_exclusive_while_files_are_removed(tmp_path):
+    store = DiskStore(tmp_path, max_bytes=None)
+    holders = []
+    overlaps = []
+
+    def work():
+        for _ in range(20):
+            with store.lock("key"):
+                holders.append(1)
+                if len(holders) > 1:
+                    overlaps.append(len(holders))
+                time.sleep(0.0005)
+                holders.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert overlaps == []
+    assert list((tmp_path / "locks").iterdir()) == []
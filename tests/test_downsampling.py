@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from src.downsampling import downsample_lines, lttb
+
+
+def _jobs() -> pd.DataFrame:
+    """Like the vega jobs dataset: one value per job, sex and year"""
+    rows = [(f"job {j}", sex, 1850 + 10 * y, j + y + (0.5 if sex == "men" else 0.0))
+            for j in range(253) for y in range(16) for sex in ("men", "women")]
+    return pd.DataFrame(rows, columns=["job", "sex", "year", "perc"])
+
+
+def test_short_lines_are_kept_completely():
+    df = _jobs()
+    data = downsample_lines(df, "year", "perc", "job")
+
+    assert len(data) == len(df)  # neither downsampled nor men and women averaged
+    expected = df[["year", "perc", "job"]].sort_values(["job", "year", "perc"]).reset_index(drop=True)
+    assert data.sort_values(["job", "year", "perc"]).reset_index(drop=True).equals(expected)
+
+
+def test_long_lines_are_downsampled_within_the_budget():
+    x = np.arange(100_000)
+    df = pd.DataFrame({"x": np.concatenate([x, x[:50]]), "y": np.concatenate([np.sin(x / 1000), x[:50]]),
+                       "line": ["long"] * len(x) + ["short"] * 50})
+    data = downsample_lines(df, "x", "y", "line", max_points=2000)
+
+    assert (data["line"] == "short").sum() == 50
+    assert (data["line"] == "long").sum() == 1950
+    assert len(data) == 2000
+
+
+def test_true_duplicates_are_averaged():
+    df = pd.DataFrame({"x": np.repeat(np.arange(3000), 2), "y": np.tile([1.0, 3.0], 3000)})
+    data = downsample_lines(df, "x", "y", max_points=2000)
+
+    assert len(data) == 2000
+    assert (data["y"] == 2.0).all()
+
+
+def test_lttb_keeps_the_ends_and_the_peak():
+    y = np.zeros(1000)
+    y[500] = 10
+    indices = lttb(np.arange(1000), y, 10)
+
+    assert len(indices) == 10
+    assert indices[0] == 0 and indices[-1] == 999 and 500 in indices
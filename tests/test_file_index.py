@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from ui.components.file_index import FileIndex
+
+
+def _walk(root) -> list:
+    return sorted(os.path.relpath(os.path.join(dp, f), root) for dp, dn, fn in os.walk(root) for f in fn)
+
+
+def _paths(index: FileIndex, root) -> list:
+    return sorted(info.path for info in index.list_files(root))
+
+
+def test_unchanged_folders_are_not_scanned_again(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "a.csv").write_text("a\n1\n")
+    index = FileIndex()
+
+    assert _paths(index, tmp_path) == [os.path.join("sub", "a.csv")]
+    assert index.scanned_dirs == 2
+    index.list_files(tmp_path)
+    assert index.scanned_dirs == 2
+
+
+def test_changed_folders_are_scanned_again(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "a.csv").write_text("a\n1\n")
+    index = FileIndex()
+    index.list_files(tmp_path)
+
+    (tmp_path / "sub" / "b.csv").write_text("b\n2\n")
+    stat = os.stat(tmp_path / "sub")
+    # make sure the folder's mtime differs, even on file systems with a coarse resolution
+    os.utime(tmp_path / "sub", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert _paths(index, tmp_path) == [os.path.join("sub", "a.csv"), os.path.join("sub", "b.csv")]
+    assert index.scanned_dirs == 3  # only "sub" was scanned again
+
+
+def test_removed_folders_are_forgotten(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "a.csv").write_text("a\n1\n")
+    index = FileIndex()
+    index.list_files(tmp_path)
+
+    os.remove(tmp_path / "sub" / "a.csv")
+    os.rmdir(tmp_path / "sub")
+
+    assert _paths(index, tmp_path) == []
+
+
+def test_symlinks_are_listed_like_os_walk(tmp_path):
+    (tmp_path / "a.csv").write_text("a\n1\n")
+    try:
+        os.symlink("..", tmp_path / "loop", target_is_directory=True)
+        os.symlink("a.csv", tmp_path / "link.csv")
+    except (OSError, NotImplementedError):
+        pytest.skip("symlinks aren't supported here")
+
+    assert _paths(FileIndex(), tmp_path) == _walk(tmp_path) == ["a.csv", "link.csv"]
@@ -0,0 +1,106 @@
+import threading
+import types
+
+from ui.session_state.global_store import GlobalStore
+
+
+class CountingSizeof(object):
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, value):
+        self.calls += 1
+        return len(value)
+
+
+def test_reads_do_not_measure_values():
+    sizeof = CountingSizeof()
+    store = GlobalStore(max_bytes=None, sizeof=sizeof)
+    store.set("state", [1, 2])
+    assert sizeof.calls == 1
+
+    for _ in range(10):
+        assert "state" in store
+        assert store["state"] == [1, 2]
+        assert store.get("state") == [1, 2]
+    assert sizeof.calls == 1
+
+
+def test_refresh_sizes_accounts_for_mutations_and_enforces_the_budget():
+    store = GlobalStore(max_bytes=5, sizeof=len)
+    old = [1, 2]
+    store.set("old", old)
+    store.set("new", [1, 2])
+    old.extend([3, 4])
+    assert store.stats()["bytes"] == 4
+
+    assert store.refresh_sizes() == 2
+    assert store.stats()["bytes"] == 2  # "old" was evicted to stay within 5 bytes
+    assert "old" not in store and "new" in store
+    assert store.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_purged():
+    now = [0.0]
+    store = GlobalStore(max_bytes=None, default_ttl=10, sizeof=len, clock=lambda: now[0])
+    store.set("state", [1])
+    now[0] = 10
+    assert store.purge_expired() == 1
+    assert len(store) == 0
+
+
+def test_refresh_sizes_keeps_the_size_of_values_mutated_while_measured():
+    def sizeof(value):
+        if value == "busy":
+            raise RuntimeError("dictionary changed size during iteration")
+        return len(value)
+
+    store = GlobalStore(max_bytes=None, sizeof=len)
+    store.set("busy", "busy")
+    store.set("idle", [1])
+    store._sizeof = sizeof
+    store.get("idle").append(2)
+
+    assert store.refresh_sizes() == 1
+    assert store.stats()["bytes"] == 6
+
+
+def test_maintenance_survives_failures():
+    calls = []
+    done = threading.Event()
+
+    def sizeof(value):
+        calls.append(value)
+        if len(calls) == 2:
+            raise ValueError("broken")
+        if len(calls) >= 3:
+            done.set()
+        return 1
+
+    store = GlobalStore(max_bytes=None, sizeof=len)
+    store.set("state", [1])
+    store._sizeof = sizeof
+    store.start(interval=0.01)
+    try:
+        assert done.wait(5)
+    finally:
+        store.stop()
+
+
+def test_states_of_a_reimported_store_are_kept(monkeypatch):
+    from ui.session_state import st_state_patch
+
+    old_store = GlobalStore(max_bytes=None)
+    old_store.set("state", [1])
+    old_store.start(interval=60)
+    monkeypatch.setattr(st_state_patch, "GLOBAL_CONTAINER", types.SimpleNamespace(_global_state=old_store))
+    # Streamlit re-imports changed modules, the stored instance then belongs to the old class object
+    monkeypatch.setattr(st_state_patch, "GlobalStore", type("GlobalStore", (GlobalStore,), {}))
+
+    store, _ = st_state_patch._get_global_state()
+    try:
+        assert store is not old_store
+        assert store["state"] == [1]
+        assert old_store._stop_event is None
+    finally:
+        store.stop()
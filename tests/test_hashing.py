@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.caching import FAST_HASH_FUNCS, Hasher, cache, sampled_hash_funcs
+
+
+@pytest.mark.parametrize("first, second", [
+    ([1, 2], ["1", "2"]),
+    ([None, "a"], ["None", "a"]),
+    ([1.0, "a"], ["1.0", "a"]),
+    ([[1, 2], "a"], ["[1, 2]", "a"]),
+])
+def test_object_values_of_different_types_hash_differently(first, second):
+    hasher = Hasher()
+    assert hasher.digest(np.array(first, dtype=object)) != hasher.digest(np.array(second, dtype=object))
+    assert hasher.digest(pd.DataFrame({"a": pd.Series(first, dtype=object)})) != \
+        hasher.digest(pd.DataFrame({"a": pd.Series(second, dtype=object)}))
+
+
+@pytest.mark.parametrize("hash_funcs", [FAST_HASH_FUNCS, sampled_hash_funcs(threshold_bytes=0, sample_bytes=16)])
+def test_equal_frames_hash_equally(hash_funcs):
+    def frame() -> pd.DataFrame:
+        return pd.DataFrame({"x": np.arange(100.0), "label": ["a", "b"] * 50,
+                             "mixed": pd.Series([1, "b"] * 50, dtype=object)})
+
+    hasher = Hasher(hash_funcs)
+    assert hasher.digest(frame()) == hasher.digest(frame())
+    changed = frame()
+    changed.loc[0, "x"] = -1
+    assert hasher.digest(frame()) != hasher.digest(changed)
+
+
+def test_cache_distinguishes_int_and_str_columns():
+    @cache(show_spinner=False)
+    def column_types(df: pd.DataFrame) -> list:
+        return [type(v).__name__ for v in df["a"]]
+
+    assert column_types(pd.DataFrame({"a": pd.Series([1, 2], dtype=object)})) == ["int", "int"]
+    assert column_types(pd.DataFrame({"a": pd.Series(["1", "2"], dtype=object)})) == ["str", "str"]
@@ -0,0 +1,73 @@
+import json
+
+import pandas as pd
+import pytest
+
+import ui.components.loaders as loaders
+from ui.components.sidecar import configure_sidecars, get_sidecar_cache
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture(autouse=True)
+def sidecars(tmp_path):
+    sidecars = get_sidecar_cache()
+    previous = sidecars.cache_dir
+    configure_sidecars(tmp_path / "sidecars")
+    loaders.clear_cache()
+    yield sidecars
+    configure_sidecars(previous)
+    loaders.clear_cache()
+
+
+def _load_twice(path) -> tuple:
+    """Load a file, then again as after a restart: from its sidecar, if one was written"""
+    first = loaders.load_file(path)
+    loaders.clear_cache()
+    return first, loaders.load_file(path)
+
+
+def test_sidecar_gives_the_parsed_frame(tmp_path, sidecars):
+    path = tmp_path / "cars.csv"
+    pd.DataFrame({"name": ["a", "b"], "hp": [90, 120], "mpg": [30.5, None]}).to_csv(path, index=False)
+
+    first, second = _load_twice(path)
+
+    assert sidecars.size() > 0
+    assert first.equals(second)
+
+
+def test_frames_with_nested_cells_get_no_sidecar(tmp_path, sidecars):
+    path = tmp_path / "movies.json"
+    path.write_text(json.dumps([{"title": "a", "tags": ["x", "y"]}, {"title": "b", "tags": []}]))
+
+    first, second = _load_twice(path)
+
+    assert sidecars.size() == 0
+    assert first.equals(second)
+    assert second["tags"].tolist() == [["x", "y"], []]
+
+
+def test_row_estimates_of_known_versions_dont_touch_the_file(tmp_path, monkeypatch):
+    path = tmp_path / "lines.csv"
+    path.write_text("a\n" + "1\n" * 10)
+    stat = path.stat()
+    assert loaders.estimate_rows(path, stat.st_size, stat.st_mtime) == 10
+
+    monkeypatch.setattr(loaders, "_sample_lines", None)  # fails if the file is read again
+    monkeypatch.setattr(type(path), "stat", None)
+    assert loaders.estimate_rows(path, stat.st_size, stat.st_mtime) == 10
+
+
+def test_row_estimates_keep_only_the_latest_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(loaders, "ROW_ESTIMATES_MAX_ENTRIES", 3)
+    path = tmp_path / "lines.csv"
+    path.write_text("a\n" + "1\n" * 10)
+    loaders.estimate_rows(path, 22, 1.0)
+    path.write_text("a\n" + "1\n" * 20)
+    assert loaders.estimate_rows(path, 42, 2.0) == 20
+    assert len(loaders._row_estimates) == 1
+
+    for i in range(5):
+        loaders.estimate_rows(tmp_path / f"empty_{i}.csv", 0, 1.0)
+    assert len(loaders._row_estimates) == 3
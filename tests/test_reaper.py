@@ -0,0 +1,93 @@
+import threading
+import time
+import types
+
+from ui.session_state.reaper import StateReaper
+
+
+class Session(object):
+    def enqueue(self, msg):
+        pass
+
+
+def test_background_thread_reaps_closed_sessions_and_runs_tasks():
+    live, closed = Session(), Session()
+    live._session_state = {"a": 1}
+    closed._session_state = {"b": 2}
+    ran = threading.Event()
+
+    reaper = StateReaper(get_live_sessions=lambda: [live], interval=0.01, sizeof=lambda states: 8)
+    reaper.track_session(live)
+    reaper.track_session(closed)
+    reaper.add_task(ran.set)
+    reaper.start()
+    reaper.start()  # already running
+    try:
+        assert ran.wait(5)
+        deadline = time.monotonic() + 5
+        while reaper.stats()["reaped_sessions"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        reaper.stop()
+
+    assert reaper.stats()["reaped_sessions"] == 1
+    assert not hasattr(closed, "_session_state")
+    assert live._session_state == {"a": 1}
+
+
+def test_session_created_while_listing_live_sessions_is_kept():
+    new = Session()
+    new._session_state = {"a": 1}
+    reaper = StateReaper(get_live_sessions=None, sizeof=lambda states: 8)
+
+    def get_live_sessions():
+        # the session opens and gets its first state right after the live ones were listed
+        live = []
+        reaper.track_session(new)
+        return live
+
+    reaper._get_live_sessions = get_live_sessions
+    reaper.run_once()
+
+    assert new._session_state == {"a": 1}
+    assert reaper.stats()["reaped_sessions"] == 0
+
+
+def test_background_thread_survives_failures():
+    calls = []
+    done = threading.Event()
+
+    def get_live_sessions():
+        calls.append(None)
+        if len(calls) == 1:
+            raise RuntimeError("dictionary changed size during iteration")
+        done.set()
+        return []
+
+    def failing_task():
+        raise ValueError("broken")
+
+    reaper = StateReaper(get_live_sessions=get_live_sessions, interval=0.01)
+    reaper.add_task(failing_task)
+    reaper.start()
+    try:
+        assert done.wait(5)
+    finally:
+        reaper.stop()
+
+
+def test_key_counters_start_over_on_every_run(monkeypatch):
+    from ui.session_state import st_state_patch
+
+    session = Session()
+    ctx = types.SimpleNamespace(cursors={})
+    monkeypatch.setattr(st_state_patch, "get_session", lambda: session)
+    monkeypatch.setattr(st_state_patch.ReportThread, "get_report_ctx", lambda: ctx)
+    monkeypatch.setattr(st_state_patch._reaper, "start", lambda interval=None: None)
+
+    _, key_counts = st_state_patch._get_session_state()
+    key_counts["key"] += 1
+    assert st_state_patch._get_session_state()[1] is key_counts
+
+    ctx.cursors = {}  # the next run of the session's script on the same thread
+    assert st_state_patch._get_session_state()[1] == {}
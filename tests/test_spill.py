@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ui.session_state.spill import SpillStore
+
+feather = pytest.importorskip("pyarrow.feather")
+
+
+class State(object):
+    pass
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SpillStore(str(tmp_path), threshold_bytes=0, idle_seconds=None)
+
+
+def test_frames_arrow_cannot_convert_stay_in_memory(store, tmp_path):
+    state = State()
+    store.register(state)
+    state.df = pd.DataFrame({"a": [1, "x", 2.5]})
+
+    assert not store.maybe_spill(state, "df", state.df)
+    assert store.spill_state(state) == 0
+    assert state.df["a"].tolist() == [1, "x", 2.5]
+    assert store.stats()["failures"] == 1  # not retried until reassigned
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_spilled_values_are_loaded_on_access(store):
+    state = State()
+    store.register(state)
+    state.values = np.arange(10)
+
+    assert store.spill(state, "values")
+    assert "values" not in vars(state)
+    assert store.load(state, "values").tolist() == list(range(10))
+
+
+def test_reloading_removes_the_spilled_file(store, tmp_path):
+    state = State()
+    store.register(state)
+    state.df = pd.DataFrame({"a": np.arange(1000)})
+
+    for _ in range(5):
+        assert store.spill(state, "df")
+        store.load(state, "df")
+
+    assert list(tmp_path.iterdir()) == []
+    assert store.stats()["reclaimed_bytes"] == 0
+    assert store.stats()["reloads"] == 5
+
+
+def test_loaded_arrays_keep_their_file_until_released(store, tmp_path):
+    state = State()
+    store.register(state)
+    state.values = np.arange(10)
+    store.spill(state, "values")
+    store.load(state, "values")
+    assert len(list(tmp_path.iterdir())) == 1
+
+    del state.values
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_values_reassigned_while_spilling_are_kept(store, tmp_path, monkeypatch):
+    state = State()
+    store.register(state)
+    state.df = pd.DataFrame({"a": np.arange(10)})
+
+    write_feather = feather.write_feather
+
+    def write_and_reassign(*args, **kwargs):
+        write_feather(*args, **kwargs)
+        state.df = "new value"  # the script thread assigns while the idle sweep writes
+
+    monkeypatch.setattr("ui.session_state.spill.feather.write_feather", write_and_reassign)
+
+    assert not store.spill(state, "df")
+    assert state.df == "new value"
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_loaded_arrays_can_be_spilled_again(store, tmp_path):
+    state = State()
+    store.register(state)
+    state.values = np.arange(10)
+
+    for _ in range(3):
+        assert store.spill(state, "values")
+        store.load(state, "values")
+    assert store.spill(state, "values")
+    assert len(list(tmp_path.iterdir())) == 1  # the files of the earlier spills are gone with their memory maps
+    assert store.load(state, "values").tolist() == list(range(10))
+
+
+def test_other_memory_maps_are_not_spilled(store, tmp_path_factory):
+    path = tmp_path_factory.mktemp("elsewhere") / "values.npy"
+    np.save(path, np.arange(10))
+    state = State()
+    store.register(state)
+    state.values = np.load(path, mmap_mode="r")
+
+    assert not store.spill(state, "values")
@@ -1,10 +1,16 @@
 import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path, PosixPath
-from typing import Tuple, Optional, List, Generator, Any, Union
+from typing import Tuple, Optional, List, Generator, Any, Union, Dict, Callable
 
 import streamlit as st
 import pandas as pd
 
+from ui.components.file_index import FileInfo, get_file_index
+from ui.components.loaders import estimate_rows, load_file, preview_file
+
 DATA_DIR = Path('data')
 
 SUPPORTED_FILE_TYPES = {".csv", ".txt", ".json", ".avro", ".xml"}
@@ -12,12 +18,21 @@ SUPPORTED_FILE_TYPES = {".csv", ".txt", ".json", ".avro", ".xml"}
 
 def get_available_files(src_dir: Path) -> List[str]:
     """
-    Create a full list of all files in given folder and its subfolders
+    Create a full list of all files in given folder and its subfolders.
+    The listing is cached and only folders which changed since the last call are scanned again.
     :param src_dir: folder whose content will be listed
     :return: list of all files in given folder
     """
-    fs = [str(Path(dp).relative_to(src_dir)/f) for dp, dn, fn in os.walk(src_dir) for f in fn]
-    return fs
+    return [f.path for f in get_file_index().list_files(src_dir)]
+
+
+def get_file_metadata(src_dir: Path) -> Dict[str, FileInfo]:
+    """
+    Size and modification time of all files in given folder and its subfolders
+    :param src_dir: folder whose content will be listed
+    :return: mapping from file (relative to `src_dir`) to its metadata
+    """
+    return {f.path: f for f in get_file_index().list_files(src_dir)}
 
 
 def _check_defaults(datasets: List[str], defaults: Union[str, List[str]]) -> List[str]:
@@ -42,7 +57,50 @@ def filter_supported_datasets(datasets: List[str], allowed_exts: Optional[List[s
     return [ds for ds in datasets if Path(ds).suffix in allowed_exts]
 
 
-def select_file(src_folder: str, container: Optional = None, defaults: Optional[Union[str, List[str]]] = None) -> List[str]:
+def _format_size(num_bytes: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if num_bytes < 1024 or unit == "GB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+
+def _format_count(count: int) -> str:
+    for threshold, suffix in [(1e9, "B"), (1e6, "M"), (1e3, "k")]:
+        if count >= threshold:
+            return f"{count / threshold:.1f}{suffix}"
+    return str(count)
+
+
+def describe_file(src_dir: Path, file: str, metadata: Optional[Dict[str, FileInfo]] = None,
+                  with_rows: bool = True) -> str:
+    """
+    Label of a file with its size and estimated number of rows, e.g. 'data_1.csv (1.2 GB, ~12.3M rows)'
+    :param src_dir: folder the file is located in
+    :param file: file relative to `src_dir`
+    :param metadata: result of `get_file_metadata(src_dir)`, if already available
+    :param with_rows: include the estimated number of rows, which reads the start of the file unless the
+                      estimate for this version of the file is cached
+    :return: label for the file
+    """
+    if metadata is None:
+        metadata = get_file_metadata(src_dir)
+    info = metadata.get(file)
+    if info is None:
+        return file
+    rows = None
+    if with_rows:
+        try:
+            rows = estimate_rows(src_dir/file, info.size, info.mtime)
+        except OSError:
+            pass
+    details = _format_size(info.size)
+    if rows is not None:
+        details += f", ~{_format_count(rows)} rows"
+    return f"{file} ({details})"
+
+
+def select_file(src_folder: str, container: Optional = None, defaults: Optional[Union[str, List[str]]] = None,
+                show_details: bool = True, preview_rows: int = 0) -> List[str]:
     """
     Selection widget for choosing the files to work on.
     :param src_folder: sub-directory within the 'data'-directory from where the files should be used
@@ -50,6 +108,10 @@ def select_file(src_folder: str, container: Optional = None, defaults: Optional[
                       By default `st` is used.
     :param defaults: Optional preset of files to use as default.
                      Can be either a string for a single file or a list of files.
+    :param show_details: show the size next to each file and the estimated number of rows of the selected files.
+                         Estimating reads the start of a file, so it's only done for the selected ones.
+    :param preview_rows: if > 0, show this many rows of each selected file. Only the start of the files is read,
+                         loading a whole file has to be requested explicitly.
     :return: tuple with name of selected file and loaded file as pandas dataframe
     """
     if container is None:
@@ -58,7 +120,8 @@ def select_file(src_folder: str, container: Optional = None, defaults: Optional[
     container.header("Select source file(s)")
 
     src_dir = DATA_DIR/src_folder
-    available_files = get_available_files(src_dir)
+    metadata = get_file_metadata(src_dir)
+    available_files = list(metadata)
 
     file_types = list(set([Path(f).suffix for f in available_files]))
     file_types = list(SUPPORTED_FILE_TYPES.intersection(file_types))
@@ -68,12 +131,104 @@ def select_file(src_folder: str, container: Optional = None, defaults: Optional[
     defaults = _check_defaults(datasets, defaults)
     defaults = [d for d in defaults if d]  # drop invalid defaults
 
-    selected_files = container.multiselect("Source file: ", options=datasets, default=defaults)
+    if show_details:
+        # sizes come from the file index, labeling doesn't touch the files
+        labels = {f: describe_file(src_dir, f, metadata, with_rows=False) for f in datasets}
+        format_func = labels.get
+    else:
+        format_func = str
+    selected_files = container.multiselect("Source file: ", options=datasets, default=defaults,
+                                           format_func=format_func)
 
     if len(selected_files) == 0:
         container.error("No valid file selected")
         return []
+
+    if show_details:
+        container.text("\n".join(describe_file(src_dir, f, metadata) for f in selected_files))
+
+    if preview_rows > 0:
+        show_preview(src_folder, selected_files, container, preview_rows)
+
+    # return [src_dir/f for f in selected_files]
+    return selected_files
+
+
+def show_preview(src_folder: str, files: List[str], container: Optional = None, n_rows: int = 10) -> None:
+    """
+    Show the first rows of each file. The whole file is only loaded when requested via checkbox.
+    :param src_folder: sub-directory within the 'data'-directory passed to `select_file`
+    :param files: selected files
+    :param container: streamlit container in which the component will be placed. By default `st` is used.
+    :param n_rows: number of rows to show
+    """
+    if container is None:
+        container = st
+
+    for f in files:
+        path = DATA_DIR/src_folder/f
+        container.subheader(f)
+        if container.checkbox("Load complete file", key=f"load_complete::{src_folder}::{f}"):
+            df = load_file(path)
+            container.write(f"{len(df)} rows x {len(df.columns)} columns")
+            container.dataframe(df.head(n_rows))
+        else:
+            container.dataframe(preview_file(path, n_rows))
+
+
+def load_selected_file(src_folder: str, file: str) -> pd.DataFrame:
+    """
+    Load a file returned by `select_file` into a dataframe.
+    Unchanged files are served from cache instead of being parsed again.
+    :param src_folder: sub-directory within the 'data'-directory passed to `select_file`
+    :param file: selected file
+    :return: content of the file
+    """
+    return load_file(DATA_DIR/src_folder/file)
+
+
+@dataclass
+class LoadResult:
+    data: pd.DataFrame
+    parse_times: Dict[str, float]  # seconds spent loading each file
+
+
+def _timed_load(path: Path) -> Tuple[pd.DataFrame, float]:
+    start = time.perf_counter()
+    df = load_file(path)
+    return df, time.perf_counter() - start
+
+
+def load_selected(src_folder: str, files: List[str], max_workers: Optional[int] = None,
+                  use_processes: bool = False) -> LoadResult:
+    """
+    Load all files returned by `select_file` in parallel and concatenate them into one dataframe.
+    Columns are aligned by name, columns missing in some files are filled with NaN.
+    :param src_folder: sub-directory within the 'data'-directory passed to `select_file`
+    :param files: selected files
+    :param max_workers: number of files parsed in parallel. Defaults to one per file, at most one per CPU core.
+    :param use_processes: parse in a process pool instead of a thread pool.
+                          Helps parsers holding the GIL, but results must be pickled back to this process
+                          and the in-memory cache of `load_file` isn't shared.
+    :return: concatenated data and the time spent loading each file
+    """
+    paths = [DATA_DIR/src_folder/f for f in files]
+    if len(paths) == 0:
+        return LoadResult(pd.DataFrame(), {})
+
+    if max_workers is None:
+        max_workers = min(len(paths), os.cpu_count() or 1)
+
+    if max_workers <= 1:
+        results = [_timed_load(p) for p in paths]
     else:
-        # return [src_dir/f for f in selected_files]
-        return selected_files
+        pool_cls: Callable[..., Executor] = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with pool_cls(max_workers=max_workers) as pool:
+            results = list(pool.map(_timed_load, paths))
+
+    frames = [df for df, _ in results]
+    parse_times = {f: t for f, (_, t) in zip(files, results)}
 
+    # concatenate once instead of appending frame by frame, which would copy the data over and over
+    data = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True, sort=False)
+    return LoadResult(data, parse_times)
@@ -0,0 +1,183 @@
+"""Persistent cache for datasets downloaded over HTTP
+
+The raw response is kept on disk together with its `ETag`/`Last-Modified` validators and a columnar (Feather) copy
+of the parsed data. Later loads - also by other processes or after a restart - only send a conditional request and
+read the local copy if the server answers "304 Not Modified". Without a connection the local copy is used as is.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import pandas as pd
+
+from ui.components.sidecar import read_frame, write_frame
+
+DATASET_CACHE_DIR = Path(os.environ.get("DATASET_CACHE_DIR", "data/interim/datasets"))
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    digest: str  # SHA-1 of the raw content, names the files holding it
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = 0.0  # time.time() of the last successful (re)validation
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)  # readers never see a half written file
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+class DatasetCache:
+    def __init__(self, cache_dir: Union[str, Path] = DATASET_CACHE_DIR, timeout: float = 10, max_age: float = 0,
+                 retry_after: float = 60):
+        """
+        Download datasets only once and revalidate them with conditional requests afterwards
+        :param cache_dir: folder for raw responses, their metadata and the parsed copies
+        :param timeout: timeout in seconds for requests
+        :param max_age: seconds a cached response is used without revalidating it
+        :param retry_after: seconds to use the cached response without contacting the server after a failed request
+        """
+        self.cache_dir = Path(cache_dir)
+        self.timeout = timeout
+        self.max_age = max_age
+        self.retry_after = retry_after
+        self._failed_at: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _url_id(url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _meta_path(self, url: str) -> Path:
+        return self.cache_dir/f"{self._url_id(url)}.json"
+
+    def _raw_path(self, url: str, digest: str) -> Path:
+        return self.cache_dir/f"{self._url_id(url)}_{digest}.raw"
+
+    def _frame_path(self, url: str, digest: str) -> Path:
+        return self.cache_dir/f"{self._url_id(url)}_{digest}.feather"
+
+    def _read_meta(self, url: str) -> Optional[CachedResponse]:
+        try:
+            meta = CachedResponse(**json.loads(self._meta_path(url).read_text()))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+        return meta if self._raw_path(url, meta.digest).is_file() else None
+
+    def _write_meta(self, meta: CachedResponse) -> None:
+        _write_atomic(self._meta_path(meta.url), json.dumps(asdict(meta)).encode("utf-8"))
+
+    def _remove_stale(self, url: str, digest: str) -> None:
+        for p in self.cache_dir.glob(f"{self._url_id(url)}_*"):
+            if not p.name.startswith(f"{self._url_id(url)}_{digest}."):
+                try:
+                    p.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def _revalidate(self, url: str, meta: Optional[CachedResponse]) -> CachedResponse:
+        request = urllib.request.Request(url)
+        if meta is not None:
+            if meta.etag:
+                request.add_header("If-None-Match", meta.etag)
+            if meta.last_modified:
+                request.add_header("If-Modified-Since", meta.last_modified)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                data = response.read()
+                headers = response.headers
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and meta is not None:
+                meta.fetched_at = time.time()
+                self._write_meta(meta)
+                return meta
+            raise
+
+        digest = hashlib.sha1(data).hexdigest()
+        meta = CachedResponse(url, digest, headers.get("ETag"), headers.get("Last-Modified"), time.time())
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self._raw_path(url, digest), data)
+        self._write_meta(meta)  # written last, it's what makes the new content visible
+        self._remove_stale(url, digest)
+        return meta
+
+    def fetch(self, url: str) -> CachedResponse:
+        """
+        Make sure an up-to-date copy of `url` is on disk
+        :param url: resource to download
+        :return: metadata of the cached response, stale if the server can't be reached
+        """
+        with self._lock:
+            lock = self._locks.setdefault(url, threading.Lock())
+        with lock:  # one request per URL at a time, concurrent callers use its result
+            meta = self._read_meta(url)
+            if meta is not None:
+                if time.time() - meta.fetched_at < self.max_age:
+                    return meta
+                failed_at = self._failed_at.get(url)
+                if failed_at is not None and time.monotonic() - failed_at < self.retry_after:
+                    return meta  # don't block every call on an unreachable server
+            try:
+                meta = self._revalidate(url, meta)
+            except OSError:  # includes URLError, HTTPError and timeouts
+                self._failed_at[url] = time.monotonic()
+                if meta is None:
+                    raise
+                return meta
+            self._failed_at.pop(url, None)
+            return meta
+
+    def read_bytes(self, url: str) -> bytes:
+        return self._raw_path(url, self.fetch(url).digest).read_bytes()
+
+    def read_json(self, url: str) -> pd.DataFrame:
+        """
+        Dataframe of a JSON dataset, parsed only once per version of the remote file
+        :param url: JSON resource
+        :return: parsed data, read from the columnar copy if available
+        """
+        meta = self.fetch(url)
+        frame_path = self._frame_path(url, meta.digest)
+        if frame_path.is_file():
+            try:
+                return read_frame(frame_path)
+            except (OSError, ValueError):
+                pass  # removed by a newer version in the meantime, or damaged
+        df = pd.read_json(self._raw_path(url, meta.digest))
+        write_frame(df, frame_path)  # skipped without pyarrow or for columns it can't represent
+        return df
+
+    def clear(self) -> None:
+        with self._lock:
+            for p in self.cache_dir.glob("*"):
+                p.unlink()
+            self._failed_at.clear()
+
+
+_datasets = DatasetCache()
+
+
+def get_dataset_cache() -> DatasetCache:
+    return _datasets
+
+
+def read_json_dataset(url: str) -> pd.DataFrame:
+    """Dataframe of the JSON dataset at `url`, see `DatasetCache.read_json`"""
+    return _datasets.read_json(url)
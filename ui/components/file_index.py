@@ -0,0 +1,121 @@
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+
+@dataclass(frozen=True)
+class FileInfo:
+    path: str  # relative to the indexed root folder
+    size: int
+    mtime: float
+
+
+@dataclass
+class _DirEntry:
+    mtime_ns: int
+    files: List[Tuple[str, int, float]]  # name, size, mtime
+    subdirs: List[str]
+    # FileInfo objects per relative prefix, as a folder can be listed from different roots
+    infos: Dict[str, List[FileInfo]] = field(default_factory=dict)
+
+    def file_infos(self, rel_prefix: str) -> List[FileInfo]:
+        infos = self.infos.get(rel_prefix)
+        if infos is None:
+            infos = [FileInfo(rel_prefix + name, size, mtime) for name, size, mtime in self.files]
+            self.infos[rel_prefix] = infos
+        return infos
+
+
+class FileIndex:
+    """
+    Cached listing of folders, refreshed incrementally.
+
+    Every folder is scanned once with `os.scandir` and its files (with size and mtime) and sub-folders are cached.
+    On refresh only the modification time of the folders is checked and only folders whose content changed
+    (i.e. files or folders were added, removed or renamed) are scanned again.
+    Note: modifying a file in place doesn't change the mtime of its folder, so its size/mtime stay stale
+    until something else in the folder changes or `invalidate` is called.
+    """
+
+    def __init__(self):
+        self._dirs: Dict[str, _DirEntry] = {}
+        self._lock = threading.Lock()
+        self.scanned_dirs = 0  # number of folders (re-)scanned so far
+
+    def _scan_dir(self, path: str, mtime_ns: int) -> _DirEntry:
+        files = []
+        subdirs = []
+        with os.scandir(path) as it:
+            for entry in it:
+                # like os.walk, don't descend into symlinked folders (they might point back up the tree)
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif entry.is_file():
+                    st = entry.stat()
+                    files.append((entry.name, st.st_size, st.st_mtime))
+        self.scanned_dirs += 1
+        return _DirEntry(mtime_ns, files, subdirs)
+
+    def _refresh(self, root: str) -> List[FileInfo]:
+        seen = set()
+        files = []
+
+        def visit(path: str, rel_prefix: str):
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                return  # removed in the meantime
+            seen.add(path)
+
+            cached = self._dirs.get(path)
+            if cached is None or cached.mtime_ns != mtime_ns:
+                try:
+                    cached = self._scan_dir(path, mtime_ns)
+                except OSError:
+                    return
+                self._dirs[path] = cached
+
+            files.extend(cached.file_infos(rel_prefix))
+            for name in cached.subdirs:
+                visit(os.path.join(path, name), rel_prefix + name + os.sep)
+
+        visit(root, "")
+
+        # forget folders below root which don't exist anymore
+        prefix = root + os.sep
+        for path in [p for p in self._dirs if (p == root or p.startswith(prefix)) and p not in seen]:
+            del self._dirs[path]
+
+        return files
+
+    def list_files(self, src_dir: Union[str, Path]) -> List[FileInfo]:
+        """
+        List all files in given folder and its subfolders, using the cache for unchanged folders
+        :param src_dir: folder whose content will be listed
+        :return: list of files with paths relative to `src_dir`
+        """
+        with self._lock:
+            return self._refresh(os.path.normpath(str(src_dir)))
+
+    def invalidate(self, src_dir: Union[str, Path, None] = None) -> None:
+        """
+        Drop cached folders, forcing a full rescan on next access
+        :param src_dir: folder (including subfolders) to drop. Drops everything if `None`.
+        """
+        with self._lock:
+            if src_dir is None:
+                self._dirs.clear()
+                return
+            root = os.path.normpath(str(src_dir))
+            prefix = root + os.sep
+            for path in [p for p in self._dirs if p == root or p.startswith(prefix)]:
+                del self._dirs[path]
+
+
+_file_index = FileIndex()
+
+
+def get_file_index() -> FileIndex:
+    return _file_index
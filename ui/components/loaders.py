@@ -0,0 +1,261 @@
+import collections
+import json
+import threading
+import xml.etree.ElementTree as ElementTree
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - only needed to pick the fastest parsers
+    import pyarrow.json as pa_json
+except ImportError:
+    pyarrow = pa_json = None
+
+# `pd.read_csv` supports the pyarrow engine since pandas 1.4
+_PANDAS_VERSION = tuple(int(part) for part in pd.__version__.split(".")[:2])
+_CSV_ENGINE = "pyarrow" if pyarrow is not None and _PANDAS_VERSION >= (1, 4) else "c"
+
+from ui.components.sidecar import get_sidecar_cache
+
+Loader = Callable[[Path], pd.DataFrame]
+
+# file extension -> function loading such a file into a dataframe
+LOADERS: Dict[str, Loader] = {}
+
+# number of loaded files kept in memory
+CACHE_MAX_ENTRIES = 32
+
+_cache: "collections.OrderedDict[Tuple[str, int, int], pd.DataFrame]" = collections.OrderedDict()
+_cache_lock = threading.Lock()
+
+_sidecars = get_sidecar_cache()
+
+
+def register_loader(*extensions: str) -> Callable[[Loader], Loader]:
+    """
+    Decorator registering a function as loader for the given file extensions
+    :param extensions: file extensions including the leading dot, e.g. ".csv"
+    :return: decorator returning the function unchanged
+    """
+    def decorator(fn: Loader) -> Loader:
+        for ext in extensions:
+            LOADERS[ext.lower()] = fn
+        return fn
+    return decorator
+
+
+def get_loader(path: Union[str, Path]) -> Loader:
+    ext = Path(path).suffix.lower()
+    try:
+        return LOADERS[ext]
+    except KeyError:
+        raise ValueError(f"No loader for file type '{ext}' ({path})")
+
+
+def _first_char(path: Path) -> str:
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(4096), b''):
+            stripped = chunk.lstrip()
+            if stripped:
+                return chr(stripped[0])
+    return ''
+
+
+@register_loader(".csv")
+def load_csv(path: Path) -> pd.DataFrame:
+    # the multi-threaded pyarrow parser is the fastest, pandas' C parser the fallback
+    return pd.read_csv(path, engine=_CSV_ENGINE)
+
+
+def _is_json_lines(path: Path) -> bool:
+    """Whether a json file contains one object per line"""
+    if _first_char(path) != '{':
+        return False
+    with open(path, 'rb') as f:
+        first_line = f.readline()
+        if f.read(1) == b'':
+            return False
+    try:
+        json.loads(first_line)
+    except ValueError:
+        return False  # a single object spanning several lines
+    return True
+
+
+@register_loader(".json")
+def load_json(path: Path) -> pd.DataFrame:
+    if _first_char(path) == '[':
+        return pd.read_json(path, orient="records")
+
+    if not _is_json_lines(path):
+        try:
+            return pd.read_json(path)
+        except ValueError:  # a flat object of scalars becomes a single row
+            return pd.read_json(path, typ="series").to_frame().T
+    if pa_json is not None:
+        return pa_json.read_json(path).to_pandas()
+    return pd.read_json(path, lines=True)
+
+
+@register_loader(".txt")
+def load_text(path: Path) -> pd.DataFrame:
+    with open(path, encoding="utf-8") as f:
+        return pd.DataFrame({"line": f.read().splitlines()})
+
+
+@register_loader(".avro")
+def load_avro(path: Path) -> pd.DataFrame:
+    try:
+        import fastavro
+    except ImportError:
+        raise ImportError("Reading .avro files requires `fastavro` (pip install fastavro)")
+    with open(path, 'rb') as f:
+        return pd.DataFrame.from_records(list(fastavro.reader(f)))
+
+
+@register_loader(".xml")
+def load_xml(path: Path) -> pd.DataFrame:
+    if hasattr(pd, "read_xml"):  # pandas >= 1.3
+        return pd.read_xml(path, parser="etree")  # lxml is optional
+    # every child of the root element is a row, its attributes and sub-elements are the columns
+    root = ElementTree.parse(path).getroot()
+    rows = [{**row.attrib, **{col.tag: col.text for col in row}} for row in root]
+    return pd.DataFrame.from_records(rows)
+
+
+def load_file(path: Union[str, Path]) -> pd.DataFrame:
+    """
+    Load a file into a dataframe with the loader registered for its file type.
+    Results are cached by path, size and modification time, so unchanged files are never parsed twice.
+    Parsed files are also written as columnar sidecar (see `ui.components.sidecar`), which is memory mapped
+    instead of parsing the file again after a restart.
+    :param path: file to load
+    :return: loaded data. The frame is a shallow copy of the cached one, so don't modify values in place.
+    """
+    path = Path(path)
+    loader = get_loader(path)
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+
+    with _cache_lock:
+        df = _cache.get(key)
+        if df is not None:
+            _cache.move_to_end(key)
+            return df.copy(deep=False)
+
+    if stat.st_size == 0:
+        df = pd.DataFrame()
+    else:
+        df = _sidecars.read(path, stat)
+        if df is None:
+            df = loader(path)
+            _sidecars.write(path, df, stat)
+
+    with _cache_lock:
+        # drop older versions of the same file
+        for old_key in [k for k in _cache if k[0] == key[0]]:
+            del _cache[old_key]
+        _cache[key] = df
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+    return df.copy(deep=False)
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+        _row_estimates.clear()
+
+
+# sample read from the start of a file to estimate its number of rows
+ESTIMATE_SAMPLE_BYTES = 64 * 1024
+
+# formats with one row per line, after an optional header line
+_LINE_BASED = {".csv": 1, ".txt": 0}
+
+# number of row estimates kept, only the latest version of each file is
+ROW_ESTIMATES_MAX_ENTRIES = 4096
+
+# path -> (size, mtime, estimated rows)
+_row_estimates: "collections.OrderedDict[str, Tuple[int, float, Optional[int]]]" = collections.OrderedDict()
+
+
+def _sample_lines(path: Path) -> Tuple[bytes, int]:
+    with open(path, 'rb') as f:
+        sample = f.read(ESTIMATE_SAMPLE_BYTES)
+    return sample, sample.count(b'\n')
+
+
+def estimate_rows(path: Union[str, Path], size: Optional[int] = None, mtime: Optional[float] = None) -> Optional[int]:
+    """
+    Estimate the number of rows of a file without loading it,
+    based on the average width of the rows at its start and the size of the file.
+    :param path: file to estimate
+    :param size: size of the file in bytes, if already known (e.g. from the `FileIndex`)
+    :param mtime: modification time of the file, if already known. Together with `size` it identifies the version of
+        the file, so cached estimates are returned without touching the file system
+    :return: estimated number of rows or `None` for formats without one row per line (e.g. xml)
+    """
+    path = Path(path)
+    if size is None or mtime is None:
+        stat = path.stat()
+        size, mtime = stat.st_size, stat.st_mtime
+    key = str(path)
+    with _cache_lock:
+        cached = _row_estimates.get(key)
+        if cached is not None and cached[:2] == (size, mtime):
+            _row_estimates.move_to_end(key)
+            return cached[2]
+
+    ext = path.suffix.lower()
+    if size == 0:
+        estimate = 0
+    elif ext in _LINE_BASED or (ext == ".json" and _is_json_lines(path)):
+        header_lines = _LINE_BASED.get(ext, 0)
+        sample, lines = _sample_lines(path)
+        if len(sample) == size:
+            # whole file was read, count exactly (a missing trailing newline still ends a row)
+            estimate = lines + (not sample.endswith(b'\n')) - header_lines
+        elif lines == 0:
+            estimate = 1  # a single row longer than the sample
+        else:
+            avg_width = sample.rindex(b'\n') / lines
+            estimate = int(size / avg_width) - header_lines
+        estimate = max(estimate, 0)
+    else:
+        estimate = None
+
+    with _cache_lock:
+        # replaces the estimate of an older version of the file
+        _row_estimates[key] = (size, mtime, estimate)
+        _row_estimates.move_to_end(key)
+        while len(_row_estimates) > ROW_ESTIMATES_MAX_ENTRIES:
+            _row_estimates.popitem(last=False)
+    return estimate
+
+
+def preview_file(path: Union[str, Path], n_rows: int = 100) -> pd.DataFrame:
+    """
+    Read only the first rows of a file, which is fast even for huge files.
+    Formats which can't be read partially (json arrays, xml, avro) are loaded completely.
+    :param path: file to preview
+    :param n_rows: number of rows to read
+    :return: first `n_rows` rows of the file
+    """
+    path = Path(path)
+    ext = path.suffix.lower()
+    if path.stat().st_size == 0:
+        return pd.DataFrame()
+
+    if ext == ".csv" and LOADERS.get(ext) is load_csv:
+        return pd.read_csv(path, nrows=n_rows)
+    if ext == ".txt" and LOADERS.get(ext) is load_text:
+        with open(path, encoding="utf-8") as f:
+            lines = [line.rstrip("\r\n") for _, line in zip(range(n_rows), f)]
+        return pd.DataFrame({"line": lines})
+    if ext == ".json" and _is_json_lines(path):
+        return pd.read_json(path, lines=True, nrows=n_rows)
+    return load_file(path).head(n_rows)
@@ -0,0 +1,201 @@
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = feather = None
+
+# where sidecars are stored and how much disk space they may take,
+# both can be overridden with environment variables
+SIDECAR_DIR = Path(os.environ.get("SIDECAR_CACHE_DIR", "data/interim/sidecars"))
+SIDECAR_MAX_BYTES = int(os.environ.get("SIDECAR_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+
+def _round_trips(df: pd.DataFrame, table: "pa.Table") -> bool:
+    """Whether reading `table` back gives a frame equal to `df`: same columns, dtypes and kinds of cells"""
+    for _, column in df.items():
+        # lists or dicts in cells come back as numpy arrays, numbers mixed with missing values as floats
+        if column.dtype == object and pd.api.types.infer_dtype(column, skipna=True) not in ("string", "empty"):
+            return False
+    empty = table.slice(0, 0).to_pandas()  # only converts the schema
+    return (empty.columns.equals(df.columns) and empty.dtypes.equals(df.dtypes) and
+            empty.index.dtype == df.index.dtype)
+
+
+def write_frame(df: pd.DataFrame, path: Union[str, Path]) -> bool:
+    """
+    Atomically write a dataframe as uncompressed Feather (Arrow IPC) file, which can be memory mapped later on
+    :param df: data to write
+    :param path: target file
+    :return: False if pyarrow is missing or can't convert the data (e.g. columns of mixed types), or if reading the
+        file would give a different frame (e.g. lists in cells, which come back as arrays)
+    """
+    if feather is None:
+        return False
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, ValueError, TypeError):
+        return False
+    if not _round_trips(df, table):
+        return False
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)  # readers never see a half written file
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return True
+
+
+def read_frame(path: Union[str, Path]) -> pd.DataFrame:
+    """
+    Read a Feather file written by `write_frame` through a memory map instead of regular file reads
+    :param path: file to read
+    :return: loaded data
+    """
+    return feather.read_table(str(path), memory_map=True).to_pandas()
+
+
+class SidecarCache:
+    """
+    Columnar copies ("sidecars") of parsed source files.
+
+    The first time a file is loaded, the parsed dataframe is written as Feather file into `cache_dir`.
+    Later loads memory map the sidecar instead of parsing the text again.
+    Sidecars are named after the source's path, size and modification time, so changing the source invalidates them.
+    When the cache grows beyond `max_bytes`, the least recently used sidecars are removed.
+    Requires `pyarrow`, without it the cache is disabled.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path] = SIDECAR_DIR, max_bytes: Optional[int] = SIDECAR_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return feather is not None
+
+    @staticmethod
+    def _source_id(source: Path) -> str:
+        return hashlib.sha1(str(source.resolve()).encode("utf-8")).hexdigest()
+
+    def _sidecar_path(self, source: Path, stat: os.stat_result) -> Path:
+        return self.cache_dir / f"{self._source_id(source)}_{stat.st_size}_{stat.st_mtime_ns}.feather"
+
+    def read(self, source: Union[str, Path], stat: Optional[os.stat_result] = None) -> Optional[pd.DataFrame]:
+        """
+        Load the sidecar of a source file
+        :param source: original file
+        :param stat: result of `os.stat(source)`, if already available
+        :return: data of the source file or `None` if there's no up-to-date sidecar
+        """
+        if not self.enabled:
+            return None
+        source = Path(source)
+        path = self._sidecar_path(source, stat or source.stat())
+        try:
+            df = read_frame(path)
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return df
+
+    def write(self, source: Union[str, Path], df: pd.DataFrame, stat: Optional[os.stat_result] = None) -> bool:
+        """
+        Store the parsed data of a source file as sidecar, replacing sidecars of older versions
+        :param source: original file
+        :param df: parsed content of `source`
+        :param stat: result of `os.stat(source)` from before parsing it
+        :return: True if the sidecar was written
+        """
+        if not self.enabled:
+            return False
+        source = Path(source)
+        path = self._sidecar_path(source, stat or source.stat())
+
+        with self._lock:
+            for stale in self.cache_dir.glob(f"{self._source_id(source)}_*.feather"):
+                if stale != path:
+                    try:
+                        stale.unlink()
+                    except FileNotFoundError:  # removed by another worker
+                        pass
+            if not write_frame(df, path):
+                return False
+            self._enforce_budget()
+        return True
+
+    def _enforce_budget(self) -> None:
+        if self.max_bytes is None:
+            return
+        sidecars = []
+        for p in self.cache_dir.glob("*.feather"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            sidecars.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in sidecars)
+        for _, size, p in sorted(sidecars):
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def size(self) -> int:
+        total = 0
+        for p in self.cache_dir.glob("*.feather"):
+            try:
+                total += p.stat().st_size
+            except FileNotFoundError:
+                pass
+        return total
+
+    def clear(self) -> None:
+        with self._lock:
+            for p in self.cache_dir.glob("*.feather"):
+                try:
+                    p.unlink()
+                except FileNotFoundError:
+                    pass
+
+
+_sidecars = SidecarCache()
+
+
+def get_sidecar_cache() -> SidecarCache:
+    return _sidecars
+
+
+def configure_sidecars(cache_dir: Union[str, Path, None] = None, max_bytes: Optional[int] = -1) -> SidecarCache:
+    """
+    Change location and size limit of the sidecar cache
+    :param cache_dir: new folder for the sidecars, unchanged if `None`
+    :param max_bytes: new size limit, `None` for no limit, unchanged if negative
+    :return: the configured cache
+    """
+    if cache_dir is not None:
+        _sidecars.cache_dir = Path(cache_dir)
+    if max_bytes is None or max_bytes >= 0:
+        _sidecars.max_bytes = max_bytes
+    return _sidecars
@@ -114,6 +114,15 @@ def show_layouts() -> None:
         layout.main()
 
 
+def _warm_layout_data() -> None:
+    import src.layout_experiment as layout
+    layout.get_dataframe()
+
+
+def get_warmups() -> Dict[str, Callable]:
+    return {"layout dataframe": _warm_layout_data}
+
+
 def get_sections() -> Dict[str, Callable]:
     return {
         "Script Mode": show_script_mode,
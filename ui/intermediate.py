@@ -1,6 +1,7 @@
-from dataclasses import dataclass
-from typing import Dict, Callable, Collection, List
+from dataclasses import dataclass, asdict
+from typing import Dict, Callable, Collection, List, Tuple
 
+import os
 import time
 import copy
 import numpy as np
@@ -8,6 +9,15 @@ import pandas as pd
 import streamlit as st
 import altair as alt
 
+from src.assets import get_asset
+from src.caching import cache, stats_snapshot
+from src.downsampling import downsample_lines, payload_bytes
+from ui.components.datasets import read_json_dataset
+
+# point to a local mirror of the vega datasets to run without GitHub
+VEGA_BASE_URL = os.environ.get("VEGA_DATASETS_URL", "https://raw.githubusercontent.com/vega/vega-datasets/master/data/")
+VEGA_DATASETS = ["gapminder.json", "jobs.json", "flights-20k.json"]
+
 
 def show_basic_caching() -> None:
     st.header("Improve performance by caching")
@@ -26,9 +36,9 @@ def show_basic_caching() -> None:
 
     # simple caching
     with st.echo():
-        base_url = "https://raw.githubusercontent.com/vega/vega-datasets/master/data/"
+        base_url = VEGA_BASE_URL
 
-        src = st.selectbox("Vega Dataset:", ["gapminder.json", "jobs.json", "flights-20k.json"])
+        src = st.selectbox("Vega Dataset:", VEGA_DATASETS)
         df = load_data(base_url+src)
         # n = st.slider("Show first n entries:", min_value=0, max_value=len(df), value=10, step=1000)
         st.dataframe(df.head(100))
@@ -38,15 +48,30 @@ def show_basic_caching() -> None:
         create_chart = st.cache(_create_chart, allow_output_mutation=True) if use_cache else _create_chart
         chart = create_chart(df)
         st.altair_chart(chart, use_container_width=True)
+    chart_bytes, dataset_bytes = _payload_sizes(src)
+    st.write(f"Data embedded into the chart: {chart_bytes / 1024:,.0f} KB "
+             f"instead of {dataset_bytes / 1024:,.0f} KB for the complete dataset")
+    st.write("Only the charted columns are embedded, and only long lines are downsampled. Rows of a line "
+             "sharing the same x value are averaged only if the dataset has no other columns telling them apart, "
+             "so e.g. the jobs (one value per sex and year) keep all of their rows.")
 
     st.info("**Hint**: Data is cached across sessions!")
 
 
+@cache(max_entries=len(VEGA_DATASETS), show_spinner=False)
+def _payload_sizes(src: str) -> Tuple[int, int]:
+    # keyed by the dataset's name, as serializing or just hashing the dataset on every rerun costs more than it's worth
+    df = read_json_dataset(VEGA_BASE_URL + src)
+    return payload_bytes(_create_chart(df).data), payload_bytes(df)
+
+
 def _create_chart(df: pd.DataFrame) -> alt.Chart:
     x_col = "year" if 'year' in df.columns else 'date'
     val_col = df.select_dtypes([np.number]).columns[-1]
     cat_col = df.select_dtypes([np.object]).columns[0]
-    chart = alt.Chart(df).mark_line().encode(
+    # only ship the points the chart can display, instead of every row
+    data = downsample_lines(df, x_col, val_col, cat_col)
+    chart = alt.Chart(data).mark_line().encode(
         x=f"{x_col}:T",
         y=val_col,
         color=cat_col,
@@ -70,7 +95,7 @@ def show_advanced_caching() -> None:
     st.subheader("Cache custom objects")
     
     if st.checkbox("Show error message"):
-        st.image("https://aws1.discourse-cdn.com/standard10/uploads/streamlit/optimized/2X/8/8e43b6b1b88db7d0759adfe163ac1ebe09fcd3f8_2_690x401.png")
+        st.image(get_asset("hash_error"))
 
     with st.echo():
         @dataclass()
@@ -102,6 +127,12 @@ def show_advanced_caching() -> None:
         data = cached_load_data(n)
         st.text(data)
 
+    st.markdown("""Hashing large dataframe or array arguments can take as long as the function itself.
+    `st.cache` only hashes a random sample of the rows of large dataframes (over 100k rows) and arrays
+    (over 1M elements), which is fast but misses changes outside of the sample. Don't replace it with
+    `src.caching.hashing.FAST_HASH_FUNCS`: they hash every row, which is exact but several times slower
+    on large inputs (`benchmarks/bench_hashing.py` compares both).""")
+
     st.markdown('-'*6)
 
     st.subheader("Limit cache")
@@ -119,11 +150,67 @@ def show_advanced_caching() -> None:
         data = load_data(n)
         st.text(data)
 
+    st.markdown("""
+    With `ttl`, the first call after a result expired waits for it to be computed again. `src.caching.cache` can
+    return the expired result right away instead, and compute the new one in the background: **stale_while_revalidate**
+    is how many seconds after `ttl` that's acceptable, results older than that are computed before returning.""")
+    with st.echo():
+        @cache(ttl=5, stale_while_revalidate=60, max_entries=100, allow_output_mutation=True)
+        def load_objects(num_entries: int = 10) -> List[MyObject]:
+            time.sleep(1)
+            return [MyObject(np.random.randint(0, 100)) for _ in range(num_entries)]
+
+        st.text(load_objects(n))
+
+    st.subheader("Limit cache by size")
+    st.markdown("""
+    `max_entries` treats a list of ten objects the same as a dataframe of several gigabytes.
+    `src.caching.cache` takes the same arguments as `st.cache`, plus **max_bytes**: once the estimated size of all
+    cached results exceeds it, the least recently used results are evicted.""")
+    with st.echo():
+        @cache(max_bytes=50 * 1024 ** 2)
+        def random_frame(rows: int) -> pd.DataFrame:
+            return pd.DataFrame(np.random.randn(rows, 10))
+
+        rows = st.slider("Number of rows", min_value=100_000, max_value=500_000, step=100_000)
+        random_frame(rows)
+        st.write(f"Cached results take {random_frame.footprint() / 1024 ** 2:.1f} MB of at most 50 MB")
+
+    st.subheader("Share cached results between server processes")
+    st.markdown("""
+    `st.cache` keeps its results in the memory of one process, so every worker of a deployment with several
+    Streamlit processes computes them again. With **persist**, `src.caching.cache` also stores results on the local
+    disk, where the other processes load them from instead of computing them (`FUNCTION_CACHE_DIR`).""")
+    with st.echo():
+        @cache(persist=True)
+        def expensive_frame(rows: int) -> pd.DataFrame:
+            time.sleep(2)
+            return pd.DataFrame(np.random.randn(rows, 10))
+
+        shared_rows = st.slider("Number of rows", min_value=100_000, max_value=500_000, step=100_000, key="persist")
+        st.write(f"{len(expensive_frame(shared_rows)):,} rows, computed by the first process asking for them")
+
+    st.subheader("Cache statistics")
+    st.markdown("""Functions cached with `src.caching.cache` count hits, misses, evictions and expired results, the
+    time spent hashing and computing, and the compute time saved by hits. `stats_snapshot()` returns them for
+    all cached functions.""")
+    live = st.checkbox("Update statistics continuously")
+    panel = st.empty()
+    panel.dataframe(_cache_stats_frame())
+    while live:
+        time.sleep(1)
+        panel.dataframe(_cache_stats_frame())
+
+
+def _cache_stats_frame() -> pd.DataFrame:
+    rows = [{**asdict(s), "hit_rate": s.hit_rate} for s in stats_snapshot()]
+    return pd.DataFrame(rows).set_index("name") if rows else pd.DataFrame()
+
 
 def _without_caching() -> Callable:
     with st.echo():
         def load_data(src: str) -> pd.DataFrame:
-            df = pd.read_json(src)
+            df = read_json_dataset(src)  # downloaded once, then revalidated
             time.sleep(2)
             return df
 
@@ -134,7 +221,7 @@ def _with_cache() -> Callable:
     with st.echo():
         @st.cache
         def load_data(src: str) -> pd.DataFrame:
-            df = pd.read_json(src)
+            df = read_json_dataset(src)  # downloaded once, then revalidated
             time.sleep(2)
             return df
     return load_data
@@ -178,6 +265,16 @@ def show_dynamic_updating() -> None:
     _update_dataframe()
 
 
+def _warm_dataset(src: str) -> None:
+    df = _with_cache()(VEGA_BASE_URL + src)
+    st.cache(_create_chart, allow_output_mutation=True)(df)
+
+
+def get_warmups() -> Dict[str, Callable]:
+    """Cached functions of "Caching", called with the same arguments as by the section"""
+    return {f"vega dataset {src}": (lambda src=src: _warm_dataset(src)) for src in VEGA_DATASETS}
+
+
 def get_sections() -> Dict[str, Callable]:
     return {
         "Caching": show_basic_caching,
@@ -0,0 +1,317 @@
+"""Bounded, thread-safe backend for global `st.State` objects.
+
+`st.GlobalState` / `st.State(is_global=True)` used to keep every object in a
+plain dict on the `sys` module, forever and without any locking. `GlobalStore`
+replaces that dict:
+
+* entries are spread over several shards, each protected by its own lock
+* every entry can have its own time to live
+* the total (estimated) size of all entries is kept below a byte budget by
+  evicting the least recently used entries
+* `stats()` reports the number of entries, their bytes and the evictions
+
+Sizes are estimated with `src.sizing.deep_sizeof`, which accounts for the
+buffers of pandas and numpy objects. An entry is measured when it is stored.
+Since State objects are mutated after that, `refresh_sizes()` measures all
+entries again; `start()` runs it together with `purge_expired()` in a daemon
+thread. Reads never measure, measuring a big value takes as long as copying it.
+
+Usage
+-----
+
+>>> store = GlobalStore(max_bytes=1024 ** 2)
+>>> store.set("answer", 42, ttl=60)
+>>> store.get("answer")
+42
+>>> store.stats()['entries']
+1
+
+"""
+import collections
+import logging
+import threading
+import time
+
+from src.sizing import deep_sizeof
+
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+DEFAULT_NUM_SHARDS = 16
+DEFAULT_MAINTENANCE_INTERVAL = 30
+
+_MISSING = object()
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _Entry(object):
+    __slots__ = ('value', 'size', 'expires_at', 'last_access')
+
+    def __init__(self, value, size, expires_at, last_access):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.last_access = last_access
+
+
+class _Shard(object):
+    __slots__ = ('lock', 'entries')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # insertion order == access order, oldest entry first
+        self.entries = collections.OrderedDict()
+
+
+class GlobalStore(object):
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, default_ttl=None, num_shards=DEFAULT_NUM_SHARDS,
+                 sizeof=deep_sizeof, clock=time.monotonic):
+        """A sharded, size bounded key-value store with per-key TTL.
+
+        Parameters
+        ----------
+        max_bytes : int or None
+            Budget for the estimated size of all entries. Least recently used
+            entries are evicted once it is exceeded. None disables the budget.
+        default_ttl : float or None
+            Time to live in seconds for entries stored without an explicit ttl.
+        num_shards : int
+            Number of independently locked shards.
+        sizeof : callable
+            Estimates the size of a value in bytes.
+        clock : callable
+            Monotonic time source, replaceable for testing.
+
+        """
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._sizeof = sizeof
+        self._clock = clock
+        self._shards = [_Shard() for _ in range(num_shards)]
+        self._stop_event = None
+
+        self._stats_lock = threading.Lock()
+        self._bytes = 0
+        self._entries = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def _shard(self, key):
+        return self._shards[hash(key) % len(self._shards)]
+
+    def _account(self, d_entries=0, d_bytes=0, evictions=0, expirations=0):
+        with self._stats_lock:
+            self._entries += d_entries
+            self._bytes += d_bytes
+            self._evictions += evictions
+            self._expirations += expirations
+
+    def get(self, key, default=None):
+        """Return the value stored for `key`, or `default` if it is missing or expired."""
+        shard = self._shard(key)
+        now = self._clock()
+
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
+                return default
+            if entry.expires_at is not None and entry.expires_at <= now:
+                del shard.entries[key]
+                self._account(d_entries=-1, d_bytes=-entry.size, expirations=1)
+                return default
+
+            shard.entries.move_to_end(key)
+            entry.last_access = now
+            return entry.value
+
+    def set(self, key, value, ttl=None):
+        """Store `value` under `key`, replacing any previous value."""
+        self._put(key, value, ttl, replace=True)
+
+    def setdefault(self, key, value, ttl=None):
+        """Store `value` unless `key` already holds a live value. Returns the stored value."""
+        existing = self.get(key, _MISSING)
+        if existing is not _MISSING:
+            return existing
+        return self._put(key, value, ttl, replace=False)
+
+    def _put(self, key, value, ttl, replace):
+        shard = self._shard(key)
+        now = self._clock()
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl is not None else None
+        size = self._sizeof(value)
+
+        with shard.lock:
+            old = shard.entries.get(key)
+            if old is not None and not replace and (old.expires_at is None or old.expires_at > now):
+                # another thread stored a value in the meantime
+                return old.value
+            shard.entries[key] = _Entry(value, size, expires_at, now)
+            shard.entries.move_to_end(key)
+
+        if old is None:
+            self._account(d_entries=1, d_bytes=size)
+        else:
+            self._account(d_bytes=size - old.size)
+        self._enforce_budget(keep=key)
+        return value
+
+    def pop(self, key, default=None):
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.entries.pop(key, None)
+        if entry is None:
+            return default
+        self._account(d_entries=-1, d_bytes=-entry.size)
+        return entry.value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        if self.pop(key, _MISSING) is _MISSING:
+            raise KeyError(key)
+
+    def __len__(self):
+        return self._entries
+
+    def items(self):
+        """Snapshot of all live (key, value) pairs. Doesn't count as access to the entries."""
+        now = self._clock()
+        items = []
+        for shard in self._shards:
+            with shard.lock:
+                items.extend((k, e.value) for k, e in shard.entries.items()
+                             if e.expires_at is None or e.expires_at > now)
+        return items
+
+    def clear(self):
+        for shard in self._shards:
+            with shard.lock:
+                removed = list(shard.entries.values())
+                shard.entries.clear()
+            self._account(d_entries=-len(removed), d_bytes=-sum(e.size for e in removed))
+
+    def purge_expired(self):
+        """Drop all expired entries. Returns the number of removed entries."""
+        now = self._clock()
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                expired = [k for k, e in shard.entries.items()
+                           if e.expires_at is not None and e.expires_at <= now]
+                for k in expired:
+                    entry = shard.entries.pop(k)
+                    self._account(d_entries=-1, d_bytes=-entry.size, expirations=1)
+            removed += len(expired)
+        return removed
+
+    def refresh_sizes(self):
+        """Measure all entries again, as stored states may have been mutated.
+
+        Values are measured without holding their shard's lock, so reads and
+        writes aren't blocked meanwhile. Returns the change of the total bytes.
+
+        """
+        total_change = 0
+        for shard in self._shards:
+            with shard.lock:
+                entries = list(shard.entries.items())
+            for key, entry in entries:
+                try:
+                    size = self._sizeof(entry.value)
+                except RuntimeError:
+                    # mutated by another thread while being measured, keep the old size until the next run
+                    continue
+                with shard.lock:
+                    if shard.entries.get(key) is not entry:
+                        continue  # replaced or removed in the meantime
+                    size_change = size - entry.size
+                    entry.size = size
+                if size_change:
+                    self._account(d_bytes=size_change)
+                    total_change += size_change
+        self._enforce_budget()
+        return total_change
+
+    def start(self, interval=DEFAULT_MAINTENANCE_INTERVAL):
+        """Purge expired entries and refresh sizes periodically in a daemon thread."""
+        if self._stop_event is not None:
+            return
+
+        self._stop_event = threading.Event()
+        stop_event = self._stop_event
+
+        def loop():
+            while not stop_event.wait(interval):
+                try:
+                    self.purge_expired()
+                    self.refresh_sizes()
+                except Exception:
+                    # keep the thread alive, otherwise expiry and the budget stop for good
+                    _LOGGER.exception("Maintenance of the global store failed")
+
+        threading.Thread(target=loop, name='GlobalStoreMaintenance', daemon=True).start()
+
+    def stop(self):
+        if self._stop_event is not None:
+            self._stop_event.set()
+            self._stop_event = None
+
+    def _enforce_budget(self, keep=None):
+        if self.max_bytes is None:
+            return
+
+        while self._bytes > self.max_bytes:
+            # every shard is ordered by access, so the overall LRU entry is the
+            # oldest of the shards' first entries
+            victim_shard = None
+            victim_access = None
+            for shard in self._shards:
+                with shard.lock:
+                    for k, entry in shard.entries.items():
+                        if k != keep:
+                            if victim_access is None or entry.last_access < victim_access:
+                                victim_shard, victim_access = shard, entry.last_access
+                            break
+
+            if victim_shard is None:
+                # only the entry just written is left, keep it even if it's too big
+                return
+
+            with victim_shard.lock:
+                for k, entry in victim_shard.entries.items():
+                    if k != keep:
+                        del victim_shard.entries[k]
+                        self._account(d_entries=-1, d_bytes=-entry.size, evictions=1)
+                        break
+
+    def stats(self):
+        """Snapshot of the store's bookkeeping.
+
+        Returns
+        -------
+        dict
+            entries, bytes, max_bytes, evictions and expirations
+
+        """
+        with self._stats_lock:
+            return {
+                'entries': self._entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+            }
+
+
+__all__ = ['GlobalStore']
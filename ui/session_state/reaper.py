@@ -0,0 +1,249 @@
+"""Reaping of session states and key counters left behind by closed sessions.
+
+`st_state_patch` attaches `_session_state` to the session object and
+`_key_counts` to the thread running the script. When a session disconnects,
+anything still referencing its session object keeps its states alive, and
+pooled threads keep their counters forever. The `StateReaper` tracks both:
+
+* sessions with state which are no longer known to the server get their
+  `_session_state` dropped (and are removed from the session resolver)
+* threads which died, or whose counters belong to a reaped session, get their
+  `_key_counts` removed
+
+`stats()` reports the number of live and reaped sessions together with their
+approximate bytes, which shows how much memory is recovered under load.
+
+Usage
+-----
+
+>>> reaper = get_reaper()
+>>> reaper.start(interval=60)   # or call reaper.run_once() on session end
+>>> reaper.stats()['reaped_bytes']
+0
+
+"""
+import logging
+import threading
+import time
+import weakref
+
+from src.sizing import deep_sizeof
+from ui.session_state.session_resolver import get_resolver, get_sessions
+
+DEFAULT_INTERVAL = 60
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _owner(thread):
+    owner_ref = getattr(thread, '_key_counts_owner', None)
+    return owner_ref() if owner_ref is not None else None
+
+
+class StateReaper(object):
+    def __init__(self, get_live_sessions=get_sessions, interval=DEFAULT_INTERVAL, sizeof=deep_sizeof,
+                 clock=time.monotonic):
+        """Drops state of sessions which are gone.
+
+        Parameters
+        ----------
+        get_live_sessions : callable
+            Returns the session objects currently known to the server.
+        interval : float
+            Minimum number of seconds between two runs of `maybe_run`, and the
+            period of the background thread started with `start`.
+        sizeof : callable
+            Estimates the size of a session's states in bytes.
+        clock : callable
+            Monotonic time source, replaceable for testing.
+
+        """
+        self._get_live_sessions = get_live_sessions
+        self.interval = interval
+        self._sizeof = sizeof
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._sessions = weakref.WeakSet()
+        self._finalizers = {}
+        self._threads = weakref.WeakSet()
+        self._last_run = clock()
+        self._stop_event = None
+        self._tasks = []
+
+        self._live_sessions = 0
+        self._live_bytes = 0
+        self._reaped_sessions = 0
+        self._reaped_bytes = 0
+        self._collected_sessions = 0
+        self._reset_threads = 0
+
+    def _on_collected(self, session_id):
+        with self._lock:
+            self._finalizers.pop(session_id, None)
+            self._collected_sessions += 1
+
+    def track_session(self, session):
+        """Remember a session which has state attached."""
+        with self._lock:
+            if session not in self._sessions:
+                self._sessions.add(session)
+                # counts sessions which were garbage collected before being reaped
+                self._finalizers[id(session)] = weakref.finalize(session, self._on_collected, id(session))
+
+    def track_thread(self, thread):
+        """Remember a thread which has key counters attached."""
+        with self._lock:
+            self._threads.add(thread)
+
+    def maybe_run(self):
+        """Run the reaper if the last run is at least `interval` seconds ago.
+
+        This measures the states of all live sessions, so don't call it on a
+        user's request; `start` runs the reaper in its own thread instead.
+
+        """
+        if self._clock() - self._last_run >= self.interval:
+            return self.run_once()
+        return None
+
+    def run_once(self):
+        """Reap state of closed sessions and stale thread counters. Returns `stats()`."""
+        self._last_run = self._clock()
+        # snapshot the tracked sessions first: a session tracked after the live ones were
+        # listed would otherwise be taken for a closed one
+        with self._lock:
+            tracked = list(self._sessions)
+        live_ids = {id(s) for s in self._get_live_sessions()}
+
+        live_bytes = 0
+        live_sessions = 0
+        reaped_sessions = 0
+        reaped_bytes = 0
+        for session in tracked:
+            states = getattr(session, '_session_state', None)
+            if id(session) in live_ids:
+                live_sessions += 1
+                live_bytes += self._measure(states)
+                continue
+
+            reaped_bytes += self._measure(states)
+            for attr in ('_session_state', '_session_state_last_access'):
+                if hasattr(session, attr):
+                    delattr(session, attr)
+            get_resolver().forget(session)
+            reaped_sessions += 1
+            with self._lock:
+                self._sessions.discard(session)
+                finalizer = self._finalizers.pop(id(session), None)
+            if finalizer is not None:
+                finalizer.detach()
+        del tracked
+
+        reset_threads = 0
+        with self._lock:
+            threads = list(self._threads)
+        for thread in threads:
+            owner = _owner(thread)
+            # Counters of a live session's thread may be in use by a running
+            # script, so only those of dead threads or gone sessions are reset.
+            if thread.is_alive() and owner is not None and id(owner) in live_ids:
+                continue
+            for attr in ('_key_counts', '_key_counts_owner', '_key_counts_run'):
+                if hasattr(thread, attr):
+                    delattr(thread, attr)
+            reset_threads += 1
+            with self._lock:
+                self._threads.discard(thread)
+
+        with self._lock:
+            self._live_sessions = live_sessions
+            self._live_bytes = live_bytes
+            self._reaped_sessions += reaped_sessions
+            self._reaped_bytes += reaped_bytes
+            self._reset_threads += reset_threads
+
+        return self.stats()
+
+    def _measure(self, states):
+        if states is None:
+            return 0
+        try:
+            return self._sizeof(states)
+        except RuntimeError:
+            # mutated by the session's script while being measured
+            return 0
+
+    def add_task(self, task):
+        """Call `task()` after every run of the background thread, for other periodic maintenance."""
+        with self._lock:
+            if task not in self._tasks:
+                self._tasks.append(task)
+
+    def _run_tasks(self):
+        with self._lock:
+            tasks = list(self._tasks)
+        for task in tasks:
+            try:
+                task()
+            except Exception:
+                _LOGGER.exception("Reaper task %r failed", task)
+
+    def start(self, interval=None):
+        """Run the reaper periodically in a daemon thread. Does nothing if it's already running."""
+        with self._lock:
+            if interval is not None:
+                self.interval = interval
+            if self._stop_event is not None:
+                return
+            self._stop_event = threading.Event()
+            stop_event = self._stop_event
+
+        def loop():
+            while not stop_event.wait(self.interval):
+                # a failure must not end the thread, the tasks (e.g. the spill sweep) depend on it
+                try:
+                    self.run_once()
+                except Exception:
+                    _LOGGER.exception("Reaping session states failed")
+                self._run_tasks()
+
+        threading.Thread(target=loop, name='StateReaper', daemon=True).start()
+
+    def stop(self):
+        with self._lock:
+            if self._stop_event is not None:
+                self._stop_event.set()
+                self._stop_event = None
+
+    def stats(self):
+        """Bookkeeping of the reaper.
+
+        Returns
+        -------
+        dict
+            live_sessions / live_bytes: sessions with state at the last run and their bytes,
+            reaped_sessions / reaped_bytes: total sessions reaped and the bytes they held,
+            collected_sessions: sessions garbage collected on their own,
+            reset_threads: total threads whose key counters were dropped
+
+        """
+        with self._lock:
+            return {
+                'live_sessions': self._live_sessions,
+                'live_bytes': self._live_bytes,
+                'reaped_sessions': self._reaped_sessions,
+                'reaped_bytes': self._reaped_bytes,
+                'collected_sessions': self._collected_sessions,
+                'reset_threads': self._reset_threads,
+            }
+
+
+_reaper = StateReaper()
+
+
+def get_reaper():
+    return _reaper
+
+
+__all__ = ['StateReaper', 'get_reaper']
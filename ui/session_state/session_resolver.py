@@ -0,0 +1,170 @@
+"""Indexed lookup of the Streamlit session object for the current report context.
+
+Both `session_state.get` and `st_state_patch._get_session_object` need the
+session that belongs to the running script. Streamlit doesn't expose it, so the
+original hack scans every entry of `Server._session_info_by_id` on each call,
+which costs O(sessions) for every state access.
+
+The `SessionResolver` keeps an index from the report context (the identity of
+its `enqueue` callable, or of the main DeltaGenerator on older versions) to the
+session object. Sessions are held through weak references, so
+entries disappear once a session disconnects and gets garbage collected. On an
+index miss it falls back to the original scan and remembers every session it
+saw on the way.
+
+Usage
+-----
+
+>>> from ui.session_state.session_resolver import get_session
+>>> session = get_session()  # session object of the script currently running
+
+"""
+import threading
+import weakref
+
+from streamlit.server.Server import Server
+import streamlit.ReportThread as ReportThread
+
+
+def _get_session_infos():
+    current_server = Server.get_current()
+    if hasattr(current_server, '_session_infos'):
+        # Streamlit < 0.56
+        return current_server._session_infos.values()
+    else:
+        return current_server._session_info_by_id.values()
+
+
+def _session_matches(session, ctx):
+    return (
+        # Streamlit < 0.54.0
+        (hasattr(session, '_main_dg') and session._main_dg == ctx.main_dg)
+        or
+        # Streamlit >= 0.54.0
+        (not hasattr(session, '_main_dg') and session.enqueue == ctx.enqueue)
+    )
+
+
+def _ctx_key(ctx):
+    """Hashable key identifying the session a report context belongs to.
+
+    Only ids are used, so the index never keeps a session (or one of its bound
+    methods) alive. Id reuse is harmless because every hit is verified with
+    `_session_matches` before it is returned.
+    """
+    if hasattr(ctx, 'main_dg'):
+        # Streamlit < 0.54.0
+        return id(ctx.main_dg)
+    enqueue = ctx.enqueue
+    # `enqueue` is a bound method of the session, so a fresh method object is
+    # created on every attribute access; its owner is the stable part.
+    return id(getattr(enqueue, '__self__', enqueue))
+
+
+def _session_key(session):
+    if hasattr(session, '_main_dg'):
+        return id(session._main_dg)
+    enqueue = session.enqueue
+    return id(getattr(enqueue, '__self__', enqueue))
+
+
+class SessionResolver(object):
+    def __init__(self, get_session_infos=_get_session_infos):
+        """Thread-safe resolver from report context to session object.
+
+        Parameters
+        ----------
+        get_session_infos : callable
+            Returns the `SessionInfo` objects of all sessions known to the
+            server. Only used when the index doesn't know the context yet.
+
+        """
+        self._get_session_infos = get_session_infos
+        self._index = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._index)
+
+    def resolve(self, ctx):
+        """Return the session belonging to `ctx`, or None if there is none."""
+        key = _ctx_key(ctx)
+
+        with self._lock:
+            session = self._index.get(key)
+
+        if session is not None and _session_matches(session, ctx):
+            self.hits += 1
+            return session
+
+        self.misses += 1
+        return self._scan(ctx)
+
+    def forget(self, session):
+        """Drop `session` from the index, e.g. when it has been closed."""
+        with self._lock:
+            key = _session_key(session)
+            if self._index.get(key) is session:
+                del self._index[key]
+
+    def clear(self):
+        with self._lock:
+            self._index.clear()
+
+    def _scan(self, ctx):
+        this_session = None
+        seen = []
+
+        for session_info in list(self._get_session_infos()):
+            s = session_info.session
+            seen.append(s)
+            if _session_matches(s, ctx):
+                this_session = s
+
+        # Index everything we walked over, so the other sessions' next lookups
+        # are hits as well.
+        with self._lock:
+            for s in seen:
+                self._index[_session_key(s)] = s
+            if this_session is not None:
+                self._index[_ctx_key(ctx)] = this_session
+
+        return this_session
+
+
+_resolver = SessionResolver()
+
+
+def get_resolver():
+    return _resolver
+
+
+def get_sessions():
+    """All session objects currently known to the server."""
+    return [session_info.session for session_info in list(_get_session_infos())]
+
+
+def get_session():
+    """Gets the Streamlit session object of the script currently running.
+
+    Raises
+    ------
+    RuntimeError
+        If no session belongs to the current report context.
+
+    """
+    ctx = ReportThread.get_report_ctx()
+
+    this_session = _resolver.resolve(ctx) if ctx is not None else None
+
+    if this_session is None:
+        raise RuntimeError(
+            "Oh noes. Couldn't get your Streamlit Session object"
+            'Are you doing something fancy with threads?')
+
+    return this_session
+
+
+__all__ = ['SessionResolver', 'get_resolver', 'get_session', 'get_sessions']
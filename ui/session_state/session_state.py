@@ -20,8 +20,7 @@ result:
 'Mary'
 
 """
-import streamlit.ReportThread as ReportThread
-from streamlit.server.Server import Server
+from ui.session_state.session_resolver import get_session
 
 
 class SessionState(object):
@@ -74,33 +73,7 @@ def get(**kwargs):
 
     """
     # Hack to get the session object from Streamlit.
-
-    ctx = ReportThread.get_report_ctx()
-
-    this_session = None
-
-    current_server = Server.get_current()
-    if hasattr(current_server, '_session_infos'):
-        # Streamlit < 0.56
-        session_infos = Server.get_current()._session_infos.values()
-    else:
-        session_infos = Server.get_current()._session_info_by_id.values()
-
-    for session_info in session_infos:
-        s = session_info.session
-        if (
-                # Streamlit < 0.54.0
-                (hasattr(s, '_main_dg') and s._main_dg == ctx.main_dg)
-                or
-                # Streamlit >= 0.54.0
-                (not hasattr(s, '_main_dg') and s.enqueue == ctx.enqueue)
-        ):
-            this_session = s
-
-    if this_session is None:
-        raise RuntimeError(
-            "Oh noes. Couldn't get your Streamlit Session object"
-            'Are you doing something fancy with threads?')
+    this_session = get_session()
 
     # Got the session object! Now let's attach some state into it.
 
@@ -0,0 +1,325 @@
+"""Optional spill-to-disk tier for large values in session states.
+
+Users like to stash DataFrames in `st.State()` objects, and every idle browser
+tab keeps them in memory. A `SpillStore` moves such values out of the State
+object into a local file store:
+
+* numpy arrays are written as `.npy` files and loaded back with `np.load(mmap_mode='c')`
+* DataFrames are written as uncompressed Feather (Arrow IPC) files and loaded
+  back from a memory map (requires `pyarrow`)
+
+Values are spilled when they are assigned and bigger than `threshold_bytes`, or
+when their session has been idle for longer than `idle_seconds`. The next
+attribute access on the State object transparently loads the value again, so
+code only using `s.my_df` doesn't notice anything. Other types of values always
+stay in memory, and so do DataFrames Arrow can't convert, e.g. with columns of
+mixed types.
+
+Usage
+-----
+
+>>> store = SpillStore(threshold_bytes=64 * 1024 ** 2, idle_seconds=600)
+>>> store.register(state)        # state's big values may be spilled from now on
+>>> store.maybe_spill(state, 'df', state.df)
+True
+>>> store.stats()['reclaimed_bytes']
+134217728
+
+"""
+import os
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from src.sizing import deep_sizeof
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = feather = None
+
+DEFAULT_THRESHOLD_BYTES = 64 * 1024 ** 2
+DEFAULT_IDLE_SECONDS = 600
+
+
+class _SpilledValue(object):
+    __slots__ = ('path', 'kind', 'nbytes')
+
+    def __init__(self, path, kind, nbytes):
+        self.path = path
+        self.kind = kind
+        self.nbytes = nbytes
+
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    paths.clear()
+
+
+def _remove_file(files, path):
+    """Remove one file of a state and forget it, unless it can't be removed yet (e.g. still mapped on Windows)."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return
+    if path in files:
+        files.remove(path)
+
+
+class SpillStore(object):
+    def __init__(self, directory=None, threshold_bytes=DEFAULT_THRESHOLD_BYTES, idle_seconds=DEFAULT_IDLE_SECONDS,
+                 clock=time.monotonic):
+        """File store for values spilled out of State objects.
+
+        Parameters
+        ----------
+        directory : str or None
+            Where spilled values are written. Defaults to a per-process folder
+            in the system's temp directory.
+        threshold_bytes : int or None
+            Values at least this big are spilled as soon as they are assigned.
+            None only spills values of idle sessions.
+        idle_seconds : float or None
+            Sessions idle for longer than this have all their spillable values
+            spilled by `spill_idle`. None disables idle spilling.
+        clock : callable
+            Monotonic time source, replaceable for testing.
+
+        """
+        if directory is None:
+            directory = os.path.join(tempfile.gettempdir(), 'streamlit_state_spill', str(os.getpid()))
+        os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.threshold_bytes = threshold_bytes
+        self.idle_seconds = idle_seconds
+        self._clock = clock
+        self._lock = threading.RLock()
+
+        # state -> {attribute name -> _SpilledValue}
+        self._spilled = weakref.WeakKeyDictionary()
+        # state -> list of its files, removed once the state is garbage collected
+        self._files = weakref.WeakKeyDictionary()
+        # state -> names of values which failed to be written, until they are reassigned
+        self._unspillable = weakref.WeakKeyDictionary()
+
+        self._spilled_bytes = 0
+        self._reclaimed_bytes = 0
+        self._spills = 0
+        self._reloads = 0
+        self._failures = 0
+        self._last_idle_sweep = clock()
+
+    def can_spill(self, value):
+        if isinstance(value, np.ndarray):
+            if isinstance(value, np.memmap):
+                # arrays loaded back from this store can be spilled again, other memory maps are files already
+                return self._is_own_file(value.filename)
+            return value.dtype != object
+        if isinstance(value, pd.DataFrame):
+            return feather is not None
+        return False
+
+    def _is_own_file(self, path):
+        if path is None:
+            return False
+        return os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.directory)
+
+    def register(self, state):
+        """Allow values of `state` to be spilled."""
+        with self._lock:
+            if state not in self._spilled:
+                self._spilled[state] = {}
+                files = []
+                self._files[state] = files
+                weakref.finalize(state, _remove_files, files)
+
+    def is_registered(self, state):
+        return state in self._spilled
+
+    def is_spilled(self, state, name):
+        return name in self._spilled.get(state, ())
+
+    def has_spilled(self, state):
+        return bool(self._spilled.get(state))
+
+    def maybe_spill(self, state, name, value):
+        """Spill `value` if `state` is registered and the value exceeds the size threshold."""
+        if self.threshold_bytes is None or not self.is_registered(state) or not self.can_spill(value):
+            return False
+        if deep_sizeof(value) < self.threshold_bytes:
+            return False
+        return self.spill(state, name)
+
+    def spill(self, state, name):
+        """Write attribute `name` of `state` to disk and drop it from memory."""
+        value = state.__dict__.get(name)
+        if not self.can_spill(value) or name in self._unspillable.get(state, ()):
+            return False
+
+        path = os.path.join(self.directory, uuid.uuid4().hex)
+        nbytes = deep_sizeof(value)
+
+        try:
+            if isinstance(value, np.ndarray):
+                path += '.npy'
+                np.save(path, value, allow_pickle=False)
+                kind = 'npy'
+            else:
+                path += '.feather'
+                table = pa.Table.from_pandas(value, preserve_index=True)
+                # uncompressed, so the file can be memory mapped without decoding
+                feather.write_feather(table, path, compression='uncompressed')
+                kind = 'feather'
+        except Exception:
+            # e.g. object columns of mixed types Arrow can't convert, or a full disk: the value stays in memory
+            _remove_files([path])
+            with self._lock:
+                self._unspillable.setdefault(state, set()).add(name)
+                self._failures += 1
+            return False
+
+        with self._lock:
+            if state.__dict__.get(name) is not value:
+                # reassigned or deleted while it was written, the file holds an outdated value
+                _remove_files([path])
+                return False
+            self.discard(state, name)
+            self._spilled[state][name] = _SpilledValue(path, kind, nbytes)
+            self._files[state].append(path)
+            del state.__dict__[name]
+            self._spills += 1
+            self._spilled_bytes += nbytes
+            self._reclaimed_bytes += nbytes
+        return True
+
+    def load(self, state, name):
+        """Load a spilled attribute back into `state` and return it."""
+        with self._lock:
+            spilled = self._spilled.get(state, {}).pop(name, None)
+            if spilled is None:
+                raise AttributeError(name)
+
+            files = self._files[state]
+            if spilled.kind == 'npy':
+                # copy-on-write, so the loaded array is still writable; the file is removed with the last reference
+                value = np.load(spilled.path, mmap_mode='c', allow_pickle=False)
+                weakref.finalize(value, _remove_file, files, spilled.path)
+            else:
+                value = feather.read_table(spilled.path, memory_map=True).to_pandas()
+                _remove_file(files, spilled.path)
+
+            state.__dict__[name] = value
+            self._reloads += 1
+            self._spilled_bytes -= spilled.nbytes
+            self._reclaimed_bytes -= spilled.nbytes
+        return value
+
+    def assign(self, state, name, value):
+        """Set attribute `name` of `state`, forgetting a spilled value of the same name.
+
+        Takes the store's lock, so a concurrent `spill` can't drop the new value
+        in place of the one it has written.
+
+        """
+        with self._lock:
+            object.__setattr__(state, name, value)
+            self.discard(state, name)
+
+    def delete(self, state, name):
+        """Delete attribute `name` of `state`, whether it's in memory or spilled."""
+        with self._lock:
+            if not self.discard(state, name):
+                object.__delattr__(state, name)
+
+    def discard(self, state, name):
+        """Forget a spilled attribute, e.g. because it was reassigned or deleted."""
+        with self._lock:
+            self._unspillable.get(state, set()).discard(name)
+            spilled = self._spilled.get(state, {}).pop(name, None)
+            if spilled is not None:
+                self._spilled_bytes -= spilled.nbytes
+                # the value was never loaded again, so no memory map uses the file
+                _remove_file(self._files[state], spilled.path)
+        return spilled is not None
+
+    def spilled_names(self, state):
+        return list(self._spilled.get(state, ()))
+
+    def spill_state(self, state):
+        """Spill every spillable attribute of `state`. Returns the number of spilled values."""
+        names = [name for name, value in list(vars(state).items()) if self.can_spill(value)]
+        return sum(self.spill(state, name) for name in names)
+
+    def spill_idle(self, sessions, now=None):
+        """Spill the values of all sessions idle for longer than `idle_seconds`.
+
+        Parameters
+        ----------
+        sessions : iterable
+            Session objects; their State objects are found in `_session_state`
+            and their last activity in `_session_state_last_access`.
+
+        """
+        if self.idle_seconds is None:
+            return 0
+        if now is None:
+            now = self._clock()
+
+        spilled = 0
+        for session in sessions:
+            last_access = getattr(session, '_session_state_last_access', None)
+            if last_access is None or now - last_access < self.idle_seconds:
+                continue
+            for state in list(getattr(session, '_session_state', {}).values()):
+                if self.is_registered(state):
+                    spilled += self.spill_state(state)
+
+        self._last_idle_sweep = now
+        return spilled
+
+    def idle_sweep_due(self, now=None):
+        """True if the last `spill_idle` call is long enough ago to run another one."""
+        if self.idle_seconds is None:
+            return False
+        if now is None:
+            now = self._clock()
+        return now - self._last_idle_sweep >= self.idle_seconds / 2
+
+    def stats(self):
+        """Bookkeeping of the store.
+
+        Returns
+        -------
+        dict
+            spilled_values: values currently on disk,
+            spilled_bytes: in-memory size of the values currently on disk,
+            reclaimed_bytes: memory freed by spills, minus the values loaded again,
+            spills / reloads: number of values written / loaded again,
+            failures: values which couldn't be written and stayed in memory
+
+        """
+        with self._lock:
+            return {
+                'spilled_values': sum(len(names) for names in self._spilled.values()),
+                'spilled_bytes': self._spilled_bytes,
+                'reclaimed_bytes': self._reclaimed_bytes,
+                'spills': self._spills,
+                'reloads': self._reloads,
+                'failures': self._failures,
+            }
+
+
+__all__ = ['SpillStore']
@@ -73,17 +73,51 @@ exact State object you want:
     s1 = st.State(key="user metadata")
 
     print(s0 == s1)  # Prints True
+
+
+Bounded global state
+--------------------
+
+Global states live in a `GlobalStore` whose total size is limited to
+GLOBAL_STATE_MAX_BYTES; the least recently used states are evicted first.
+Sizes are measured when a state is stored and refreshed by a background thread,
+reading a global state doesn't measure it.
+A global state can also expire after a number of seconds:
+
+    s = st.GlobalState(key="exchange rates", ttl=600)
+
+    print(st.GlobalState.stats())  # entries, bytes, evictions, expirations
+
+
+Spilling session state to disk
+------------------------------
+
+Big numpy arrays and DataFrames in session states can be moved to disk, either
+right when they are assigned or once their session has been idle for a while.
+They are memory mapped back on the next attribute access. Idle sessions are
+swept by the reaper's background thread:
+
+    import ui.session_state.st_state_patch as st_state_patch
+    st_state_patch.enable_spill(threshold_bytes=64 * 1024 ** 2, idle_seconds=600)
+
+    print(st_state_patch.spill_stats())  # spilled values and reclaimed bytes
 """
 
 import inspect
 import os
 import threading
+import time
+import weakref
 import collections
 
-from streamlit.server.Server import Server
 import streamlit as st
 import streamlit.ReportThread as ReportThread
 
+from ui.session_state.global_store import GlobalStore
+from ui.session_state.reaper import get_reaper
+from ui.session_state.session_resolver import get_session, get_sessions
+from ui.session_state.spill import DEFAULT_IDLE_SECONDS, DEFAULT_THRESHOLD_BYTES, SpillStore
+
 # Normally we'd use a Streamtit module, but I want a module that doesn't live in
 # your current working directory (since local modules get removed in between
 # runs), and Streamtit devs are likely to have Streamlit in their cwd.
@@ -91,9 +125,31 @@ import sys
 
 GLOBAL_CONTAINER = sys
 
+# How keys for State objects without an explicit key are derived:
+#   "fast": walk frames lazily via sys._getframe (default)
+#   "inspect": the original inspect.stack() based implementation
+KEY_DERIVATION = "fast"
+
+# Budget (in bytes) and default time to live (in seconds) of the global state
+# store. Least recently used global states are evicted when over budget.
+GLOBAL_STATE_MAX_BYTES = 512 * 1024 ** 2
+GLOBAL_STATE_TTL = None
+
+_global_state_lock = threading.Lock()
+
+# Drops state of closed sessions and stale thread counters, see ui.session_state.reaper
+_reaper = get_reaper()
+
+# Optional spill-to-disk tier for session states, off unless enable_spill() is called
+_spill_store = None
+
+# Derived "filename :: func :: pos" prefixes, keyed by (code object, stack position)
+_BASE_KEY_CACHE_SIZE = 1024
+_base_key_cache = {}
+
 
 class State(object):
-    def __new__(cls, key=None, is_global=False):
+    def __new__(cls, key=None, is_global=False, ttl=None):
         if is_global:
             states_dict, key_counts = _get_global_state()
         else:
@@ -102,32 +158,101 @@ class State(object):
         if key is None:
             key = _figure_out_key(key_counts)
 
-        if key in states_dict:
-            return states_dict[key]
+        state = states_dict.get(key)
+        if state is None:
+            state = super(State, cls).__new__(cls)
+            if is_global:
+                # ttl (in seconds) only applies to global state
+                state = states_dict.setdefault(key, state, ttl=ttl)
+            else:
+                state = states_dict.setdefault(key, state)
 
-        state = super(State, cls).__new__(cls)
-        states_dict[key] = state
+        if not is_global and _spill_store is not None:
+            _spill_store.register(state)
 
         return state
 
-    def __init__(self, key=None, is_global=False):
+    def __init__(self, key=None, is_global=False, ttl=None):
         pass
 
     def __bool__(self):
-        return bool(len(self.__dict__))
+        return bool(len(self.__dict__)) or (_spill_store is not None and _spill_store.has_spilled(self))
 
     def __contains__(self, name):
-        return name in self.__dict__
+        return name in self.__dict__ or (_spill_store is not None and _spill_store.is_spilled(self, name))
+
+    def __getattr__(self, name):
+        # Only called if `name` isn't in __dict__, i.e. it's missing or spilled to disk.
+        if _spill_store is not None and _spill_store.is_spilled(self, name):
+            return _spill_store.load(self, name)
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        spill_store = _spill_store
+        if spill_store is None:
+            object.__setattr__(self, name, value)
+            return
+        # under the store's lock, the idle sweep may be spilling the old value
+        spill_store.assign(self, name, value)
+        spill_store.maybe_spill(self, name, value)
+
+    def __delattr__(self, name):
+        spill_store = _spill_store
+        if spill_store is None:
+            object.__delattr__(self, name)
+            return
+        spill_store.delete(self, name)
 
 
 def _get_global_state():
-    if not hasattr(GLOBAL_CONTAINER, '_global_state'):
-        GLOBAL_CONTAINER._global_state = {}
-        GLOBAL_CONTAINER._key_counts = collections.defaultdict(int)
+    with _global_state_lock:
+        store = getattr(GLOBAL_CONTAINER, '_global_state', None)
+
+        if not isinstance(store, GlobalStore):
+            new_store = GlobalStore(max_bytes=GLOBAL_STATE_MAX_BYTES, default_ttl=GLOBAL_STATE_TTL)
+            new_store.start()
+            if store is not None:
+                # Keep states created by a previous version of this module: a plain dict or,
+                # since Streamlit re-imports changed modules, a GlobalStore of an older class object.
+                for key, state in store.items():
+                    new_store[key] = state
+                if hasattr(store, 'stop'):
+                    store.stop()
+            GLOBAL_CONTAINER._global_state = new_store
+
+        if not hasattr(GLOBAL_CONTAINER, '_key_counts'):
+            GLOBAL_CONTAINER._key_counts = collections.defaultdict(int)
 
     return GLOBAL_CONTAINER._global_state, GLOBAL_CONTAINER._key_counts
 
 
+def global_state_stats():
+    """Entries, bytes, evictions and expirations of the global state store."""
+    store, _ = _get_global_state()
+    return store.stats()
+
+
+def enable_spill(directory=None, threshold_bytes=DEFAULT_THRESHOLD_BYTES, idle_seconds=DEFAULT_IDLE_SECONDS):
+    """Spill big values of session states to disk, see `ui.session_state.spill`."""
+    global _spill_store
+    _spill_store = SpillStore(directory, threshold_bytes=threshold_bytes, idle_seconds=idle_seconds)
+    # idle sessions are swept by the reaper's thread, not on the request of another user
+    _reaper.add_task(_spill_idle_sessions)
+    _reaper.start()
+    return _spill_store
+
+
+def _spill_idle_sessions():
+    store = _spill_store
+    if store is not None and store.idle_sweep_due():
+        store.spill_idle(get_sessions())
+
+
+def spill_stats():
+    """Spilled values and reclaimed bytes, or None if spilling isn't enabled."""
+    return _spill_store.stats() if _spill_store is not None else None
+
+
 def _get_session_state():
     session = _get_session_object()
 
@@ -135,48 +260,52 @@ def _get_session_state():
 
     if not hasattr(session, '_session_state'):
         session._session_state = {}
+        _reaper.track_session(session)
+        # runs the reaper in its own thread, it measures the states of all sessions
+        _reaper.start()
 
-    if not hasattr(curr_thread, '_key_counts'):
+    session._session_state_last_access = time.monotonic()
+
+    # Streamlit replaces the cursors of the report context at the start of every script run
+    run = getattr(ReportThread.get_report_ctx(), 'cursors', None)
+    owner_ref = getattr(curr_thread, '_key_counts_owner', None)
+    if (not hasattr(curr_thread, '_key_counts') or owner_ref is None or owner_ref() is not session
+            or getattr(curr_thread, '_key_counts_run', None) is not run):
         # Put this in the thread because it gets cleared on every run.
+        # A pooled thread may have run a script before, of another session or
+        # an earlier run of this one, in which case its counters must start over.
         curr_thread._key_counts = collections.defaultdict(int)
+        curr_thread._key_counts_owner = weakref.ref(session)
+        curr_thread._key_counts_run = run
+        _reaper.track_thread(curr_thread)
 
     return session._session_state, curr_thread._key_counts
 
 
 def _get_session_object():
     # Hack to get the session object from Streamlit.
+    # The resolver indexes sessions, so this no longer scans all of them.
+    return get_session()
 
-    ctx = ReportThread.get_report_ctx()
-
-    this_session = None
 
-    current_server = Server.get_current()
-    if hasattr(current_server, '_session_infos'):
-        # Streamlit < 0.56
-        session_infos = Server.get_current()._session_infos.values()
+def _figure_out_key(key_counts):
+    if KEY_DERIVATION == "inspect":
+        base_key = _figure_out_base_key_inspect()
     else:
-        session_infos = Server.get_current()._session_info_by_id.values()
+        base_key = _figure_out_base_key_fast()
+
+    if base_key is None:
+        return None
 
-    for session_info in session_infos:
-        s = session_info.session
-        if (
-                # Streamlit < 0.54.0
-                (hasattr(s, '_main_dg') and s._main_dg == ctx.main_dg)
-                or
-                # Streamlit >= 0.54.0
-                (not hasattr(s, '_main_dg') and s.enqueue == ctx.enqueue)
-        ):
-            this_session = s
+    count = key_counts[base_key]
+    key_counts[base_key] += 1
 
-    if this_session is None:
-        raise RuntimeError(
-            "Oh noes. Couldn't get your Streamlit Session object"
-            'Are you doing something fancy with threads?')
+    key = "%s :: %s" % (base_key, count)
 
-    return this_session
+    return key
 
 
-def _figure_out_key(key_counts):
+def _figure_out_base_key_inspect():
     stack = inspect.stack()
 
     for stack_pos, stack_item in enumerate(stack):
@@ -196,14 +325,35 @@ def _figure_out_key(key_counts):
     func_name = stack_item[3]
     # code_context = stack_item[4]
 
-    key = "%s :: %s :: %s" % (filename, func_name, stack_pos)
+    # inspect.stack() starts at this function, one frame below _figure_out_key
+    return "%s :: %s :: %s" % (filename, func_name, stack_pos - 1)
 
-    count = key_counts[key]
-    key_counts[key] += 1
 
-    key = "%s :: %s" % (key, count)
+def _figure_out_base_key_fast():
+    # Same result as _figure_out_base_key_inspect, but only touches the frames
+    # inside this module plus the caller's, and never reads source files.
+    frame = sys._getframe(2)  # skip this function and _figure_out_key
+    stack_pos = 1  # position of the caller of _figure_out_key
 
-    return key
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+        stack_pos += 1
+
+    if frame is None:
+        return None
+
+    code = frame.f_code
+    cache_key = (code, stack_pos)
+
+    base_key = _base_key_cache.get(cache_key)
+    if base_key is None:
+        base_key = "%s :: %s :: %s" % (code.co_filename, code.co_name, stack_pos)
+        if len(_base_key_cache) >= _BASE_KEY_CACHE_SIZE:
+            # Script reruns compile fresh code objects, so stale entries pile up.
+            _base_key_cache.clear()
+        _base_key_cache[cache_key] = base_key
+
+    return base_key
 
 
 class SessionState(object):
@@ -212,8 +362,10 @@ class SessionState(object):
 
 
 class GlobalState(object):
-    def __new__(cls, key=None):
-        return State(key=key, is_global=True)
+    def __new__(cls, key=None, ttl=None):
+        return State(key=key, is_global=True, ttl=ttl)
+
+    stats = staticmethod(global_state_stats)
 
 
 st.State = State